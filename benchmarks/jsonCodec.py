@@ -0,0 +1,45 @@
+"""
+Encode/decode throughput of the mqtt json codec on representative Hermes payloads
+Usage: python -m benchmarks.jsonCodec [iterations]
+"""
+import json
+import sys
+import timeit
+
+from core.commons.model.JsonCodec import JsonCodec
+
+UID = '2c4d0e8e-5a3b-4c58-b1c1-0f6b8e1d3a77'
+
+PAYLOADS = {
+	'vad'          : {'siteId': UID},
+	'heartbeat'    : {'uid': UID},
+	'deviceStatus' : {'uid': UID, 'dnd': True},
+	'hotword'      : {
+		'siteId'            : UID,
+		'modelId'           : 'porcupine_0',
+		'modelVersion'      : '1.7.0',
+		'modelType'         : 'universal',
+		'currentSensitivity': 0.5
+	},
+	'playFinished' : {'id': 'c1e8f6d2-7f0b-4b61-9d0f-6f37c2a4f9b1', 'sessionId': '3d2c1b0a-9f8e-4d7c-6b5a-493827161504', 'siteId': UID}
+}
+
+
+def run(iterations: int):
+	print(f'Backend: {JsonCodec.BACKEND}, {iterations} iterations per payload')
+	print(f'{"payload":<14}{"stdlib dumps":>14}{"codec dumps":>14}{"stdlib loads":>14}{"codec loads":>14}   (µs per op)')
+	for name, payload in PAYLOADS.items():
+		raw = JsonCodec.dumps(payload)
+		assert raw == json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8'), f'{name} is not byte identical'
+
+		results = [
+			timeit.timeit(lambda: json.dumps(payload), number=iterations),
+			timeit.timeit(lambda: JsonCodec.dumps(payload), number=iterations),
+			timeit.timeit(lambda: json.loads(raw), number=iterations),
+			timeit.timeit(lambda: JsonCodec.loads(raw), number=iterations)
+		]
+		print(f'{name:<14}' + ''.join(f'{result / iterations * 1e6:>14.3f}' for result in results))
+
+
+if __name__ == '__main__':
+	run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,46 @@
+"""
+Cost of reaching a manager from a ProjectAliceObject: the former property going through SuperManager.getInstance()
+against the class attribute SuperManager binds
+Usage: python -m benchmarks.managerAccess [iterations]
+"""
+import sys
+import timeit
+
+import core.base.SuperManager as SM
+from core.base.model.ProjectAliceObject import ProjectAliceObject
+
+
+class PropertyAccess:
+
+	@property
+	def ConfigManager(self):
+		return SM.SuperManager.getInstance().ConfigManager
+
+
+class BoundAccess(ProjectAliceObject):
+	pass
+
+
+def run(iterations: int):
+	superManager = SM.SuperManager(mainClass=None)
+	superManager.ConfigManager = object()
+
+	byProperty = PropertyAccess()
+	bound = BoundAccess()
+	assert byProperty.ConfigManager is bound.ConfigManager
+
+	results = {
+		'property': timeit.timeit(lambda: byProperty.ConfigManager, number=iterations),
+		'bound'   : timeit.timeit(lambda: bound.ConfigManager, number=iterations)
+	}
+	# The lambda call is paid by both, measure it to only compare the lookups
+	overhead = timeit.timeit(lambda: bound, number=iterations)
+
+	print(f'{iterations} accesses, ns per access without the call overhead')
+	for name, result in results.items():
+		print(f'{name:<10}{(result - overhead) / iterations * 1e9:>10.1f}')
+	print(f'Saving: {(results["property"] - results["bound"]) / iterations * 1e9:.1f} ns per access')
+
+
+if __name__ == '__main__':
+	run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,105 @@
+"""
+CPU spent handing captured int16 PCM to Porcupine, per second of audio. PorcupineDetector runs on a stub handler
+shaped like the pinned pvporcupine binding, whose native function does nothing, so only the python side is timed.
+The former path unpacked every window into a tuple of python ints then built a new ctypes array from it, the
+detector copies the window into a preallocated buffer shared with the ctypes array and calls the native function
+on it. Without process_func, the detector falls back to the binding's process(), which is also timed
+Usage: python -m benchmarks.porcupineConversion [seconds of audio]
+"""
+import os
+import platform
+import struct
+import sys
+import time
+from ctypes import c_short
+from enum import Enum
+from types import SimpleNamespace
+
+from core.voice.model import PorcupineWakeword
+
+SAMPLE_RATE = 16000
+FRAME_LENGTH = 512
+
+
+class StubHandler:
+	"""
+	The parts of pvporcupine 1.7.0's Porcupine the detector uses. process() is the binding's own conversion
+	"""
+
+	class PicovoiceStatuses(Enum):
+		SUCCESS = 0
+
+	frame_length = FRAME_LENGTH
+	sample_rate = SAMPLE_RATE
+	version = 'stub'
+
+	def __init__(self, native: bool = True):
+		self.nativeCalls = 0
+		self.processCalls = 0
+		if native:
+			self._handle = object()
+			self.process_func = self.nativeProcess
+
+
+	def nativeProcess(self, _handle, _pcm, result):
+		self.nativeCalls += 1
+		return self.PicovoiceStatuses.SUCCESS
+
+
+	def process(self, pcm) -> int:
+		self.processCalls += 1
+		(c_short * len(pcm))(*pcm)
+		return -1
+
+
+	def delete(self):
+		pass
+
+
+def detector(native: bool) -> PorcupineWakeword.PorcupineDetector:
+	PorcupineWakeword.pvporcupine = SimpleNamespace(create=lambda **kwargs: StubHandler(native=native))
+	return PorcupineWakeword.PorcupineDetector()
+
+
+def unpacked(data: bytes, frames: int):
+	for i in range(frames):
+		pcm = struct.unpack_from('h' * FRAME_LENGTH, data, i * FRAME_LENGTH * 2)
+		(c_short * len(pcm))(*pcm)
+
+
+def detectorRun(native: bool):
+	def run(data: bytes, frames: int):
+		porcupine = detector(native)
+		source = memoryview(data)
+		for i in range(frames):
+			porcupine.process(source[i * FRAME_LENGTH * 2:(i + 1) * FRAME_LENGTH * 2])
+
+		handler = porcupine._handler
+		# The native path must be the one taken with the pinned binding, the fallback only without it
+		assert porcupine.native == native
+		assert (handler.nativeCalls, handler.processCalls) == ((frames, 0) if native else (0, frames))
+	return run
+
+
+def run(seconds: int):
+	frames = seconds * SAMPLE_RATE // FRAME_LENGTH
+	data = os.urandom(frames * FRAME_LENGTH * 2)
+
+	# Both paths must hand porcupine the same samples
+	check = detector(native=True)
+	check.process(data[:FRAME_LENGTH * 2])
+	assert list(check._frameArray) == list(struct.unpack_from('h' * FRAME_LENGTH, data))
+
+	print(f'{platform.machine()}, {seconds}s of {SAMPLE_RATE}Hz audio, {FRAME_LENGTH} samples frames')
+	results = dict()
+	for name, func in (('unpacked', unpacked), ('native', detectorRun(native=True)), ('fallback', detectorRun(native=False))):
+		start = time.process_time()
+		func(data, frames)
+		results[name] = time.process_time() - start
+		print(f'{name:<10}{results[name] / seconds * 1000:>10.3f} ms CPU per second of audio')
+
+	print(f'Speedup: {results["unpacked"] / max(results["native"], 1e-9):.1f}x')
+
+
+if __name__ == '__main__':
+	run(int(sys.argv[1]) if len(sys.argv) > 1 else 600)
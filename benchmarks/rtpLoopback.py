@@ -0,0 +1,84 @@
+"""
+Loopback harness for the rtp audio transport. Frames go from an RtpSender through a relay that drops and reorders
+packets to an RtpReceiver, the receiver's output is checked to be in order with only the dropped frames missing
+Usage: python -m benchmarks.rtpLoopback [frames] [loss] [reorder] [depth]
+"""
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+
+from core.server.model.RtpAudio import RtpReceiver, RtpSender
+
+FRAME_SAMPLES = 320
+
+
+def relay(listen: socket.socket, target: tuple, frames: int, loss: float, reorder: float, dropped: set):
+	"""
+	Forwards packets, dropping some and holding others back until a later packet went through
+	"""
+	held = None
+	for index in range(frames):
+		data = listen.recv(65535)
+		if random.random() < loss:
+			dropped.add(index)
+			continue
+
+		if held is None and random.random() < reorder:
+			held = data
+			continue
+
+		listen.sendto(data, target)
+		if held is not None:
+			listen.sendto(held, target)
+			held = None
+
+	if held is not None:
+		listen.sendto(held, target)
+
+
+def run(frames: int, loss: float, reorder: float, depth: int):
+	received = list()
+	receiver = RtpReceiver(callback=received.append, host='127.0.0.1', depth=depth)
+	receiverThread = threading.Thread(target=receiver.run, daemon=True)
+	receiverThread.start()
+
+	listen = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+	listen.bind(('127.0.0.1', 0))
+	dropped = set()
+	relayThread = threading.Thread(target=relay, args=(listen, ('127.0.0.1', receiver.port), frames, loss, reorder, dropped), daemon=True)
+	relayThread.start()
+
+	sender = RtpSender(host='127.0.0.1', port=listen.getsockname()[1])
+	start = time.perf_counter()
+	for index in range(frames):
+		# Each frame carries its index so the receiver side can be checked
+		sender.send(pcm=struct.pack('<I', index) + bytes(FRAME_SAMPLES * 2 - 4), samples=FRAME_SAMPLES)
+		time.sleep(0.0005)
+
+	relayThread.join(timeout=10)
+	time.sleep(0.2)
+	receiver.stop()
+	elapsed = time.perf_counter() - start
+
+	indexes = [struct.unpack_from('<I', pcm)[0] for pcm in received]
+	stats = receiver.stats[sender.ssrc]
+	assert indexes == sorted(indexes), 'Frames were released out of order'
+	assert len(indexes) == len(set(indexes)), 'Frames were released twice'
+	assert set(indexes).isdisjoint(dropped), 'A dropped frame came out of the receiver'
+
+	tail = frames - len(dropped) - len(indexes)
+	print(f'{frames} frames in {elapsed:.2f}s, loss {loss:.0%}, reorder {reorder:.0%}, jitter buffer depth {depth}')
+	print(f'Relay dropped {len(dropped)}, receiver released {len(indexes)}, {tail} still held at the end of the stream')
+	print(f'Jitter buffer: {stats}')
+
+
+if __name__ == '__main__':
+	run(
+		frames=int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+		loss=float(sys.argv[2]) if len(sys.argv) > 2 else 0.02,
+		reorder=float(sys.argv[3]) if len(sys.argv) > 3 else 0.05,
+		depth=int(sys.argv[4]) if len(sys.argv) > 4 else 4
+	)
@@ -0,0 +1,208 @@
+"""
+Runs a labeled wav corpus through a wakeword detector, faster than real time and fully offline, for one or more
+sensitivities. Corpus layout:
+	positives/*.wav  one wakeword per file, ending where the file ends unless positives/labels.json maps the file name
+	                 to the keyword end, in seconds
+	negatives/*.wav  speech without the wakeword
+	noise/*.wav      noise beds, counted as negatives and mixed under the positives with --snr
+Files are converted to mono 16 bits at the detector's sample rate. Reports the detection rate, false accepts per
+hour, the latency from the keyword end and the CPU time per hour of audio
+Usage: python -m benchmarks.wakewordHarness corpus [--engine porcupine] [--sensitivities 0.3,0.5,0.7] [--snr 10] [--output results.json]
+"""
+import argparse
+import json
+import math
+import platform
+import statistics
+import time
+import wave
+from importlib import import_module
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.voice.model.WakewordDetector import WakewordDetector
+
+LEAD_SECONDS = 1.0
+TAIL_SECONDS = 1.0
+# One utterance firing on consecutive frames is one detection
+REFRACTORY_SECONDS = 1.0
+
+
+def detectorClass(engine: str, detector: Optional[str]) -> Callable[..., WakewordDetector]:
+	if detector:
+		module, name = detector.split(':')
+		return getattr(import_module(module), name)
+
+	return getattr(import_module(f'core.voice.model.{engine.title()}Wakeword'), f'{engine.title()}Detector')
+
+
+def loadWav(path: Path, sampleRate: int) -> bytes:
+	with wave.open(str(path), 'rb') as wav:
+		data = wav.readframes(wav.getnframes())
+		width = wav.getsampwidth()
+		channels = wav.getnchannels()
+		rate = wav.getframerate()
+
+	raw = np.frombuffer(data, dtype=np.uint8)
+	if width == 1:
+		# 8 bits wav samples are unsigned
+		samples = (raw.astype(np.float64) - 128) * 256
+	else:
+		# Little endian, the two most significant bytes are the last two
+		samples = raw[:len(raw) // width * width].reshape(-1, width)[:, width - 2:].copy().view('<i2').ravel().astype(np.float64)
+
+	samples = samples[:len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+	if rate != sampleRate:
+		positions = np.arange(len(samples) * sampleRate // rate) * rate / sampleRate
+		samples = np.interp(positions, np.arange(len(samples)), samples)
+	return toPcm(samples)
+
+
+def toPcm(samples: np.ndarray) -> bytes:
+	return np.clip(np.round(samples), -32768, 32767).astype(np.int16).tobytes()
+
+
+def rms(samples: np.ndarray) -> float:
+	return float(np.sqrt(np.mean(samples ** 2))) if len(samples) else 0.0
+
+
+def mix(speech: bytes, noise: bytes, snr: float) -> bytes:
+	"""
+	Noise looped or cut to the speech length, scaled to the given signal to noise ratio in dB
+	"""
+	if not noise:
+		return speech
+
+	speechSamples = np.frombuffer(speech, dtype=np.int16).astype(np.float64)
+	noiseSamples = np.resize(np.frombuffer(noise, dtype=np.int16).astype(np.float64), len(speechSamples))
+	noiseRms = rms(noiseSamples)
+	if not noiseRms:
+		return speech
+
+	factor = rms(speechSamples) / (noiseRms * 10 ** (snr / 20))
+	return toPcm(speechSamples + noiseSamples * factor)
+
+
+def detect(detector: WakewordDetector, audio: bytes) -> Tuple[List[float], float]:
+	"""
+	:return: detection times in seconds, refractory period applied, and the CPU seconds spent in the detector
+	"""
+	frameBytes = detector.frameLength * 2
+	view = memoryview(audio)
+	detections = list()
+	cpu = 0.0
+	for offset in range(0, len(audio) - frameBytes + 1, frameBytes):
+		start = time.process_time()
+		result = detector.process(view[offset:offset + frameBytes])
+		cpu += time.process_time() - start
+
+		if result > -1:
+			at = (offset + frameBytes) / 2 / detector.sampleRate
+			if not detections or at - detections[-1] >= REFRACTORY_SECONDS:
+				detections.append(at)
+
+	return detections, cpu
+
+
+def run(corpus: Path, factory: Callable[..., WakewordDetector], sensitivity: float, snr: Optional[float]) -> Dict:
+	probe = factory(sensitivity=sensitivity)
+	sampleRate = probe.sampleRate
+	probe.close()
+
+	labelsFile = corpus / 'positives' / 'labels.json'
+	labels = json.loads(labelsFile.read_text()) if labelsFile.exists() else dict()
+	noiseBeds = [loadWav(path, sampleRate) for path in sorted((corpus / 'noise').glob('*.wav'))]
+
+	latencies = list()
+	positives = detected = falseAccepts = 0
+	negativeSeconds = audioSeconds = cpu = 0.0
+
+	for index, path in enumerate(sorted((corpus / 'positives').glob('*.wav'))):
+		clip = loadWav(path, sampleRate)
+		lead = bytes(int(LEAD_SECONDS * sampleRate) * 2)
+		tail = bytes(int(TAIL_SECONDS * sampleRate) * 2)
+		audio = lead + clip + tail
+		if snr is not None and noiseBeds:
+			audio = mix(audio, noiseBeds[index % len(noiseBeds)], snr)
+
+		keywordStart = LEAD_SECONDS
+		keywordEnd = LEAD_SECONDS + labels.get(path.name, len(clip) / 2 / sampleRate)
+
+		detector = factory(sensitivity=sensitivity)
+		detections, spent = detect(detector, audio)
+		detector.close()
+
+		positives += 1
+		cpu += spent
+		audioSeconds += len(audio) / 2 / sampleRate
+
+		hits = [at for at in detections if keywordStart <= at <= keywordEnd + TAIL_SECONDS]
+		falseAccepts += len(detections) - len(hits)
+		if hits:
+			detected += 1
+			latencies.append(hits[0] - keywordEnd)
+
+	for folder in ('negatives', 'noise'):
+		for path in sorted((corpus / folder).glob('*.wav')):
+			audio = loadWav(path, sampleRate)
+			detector = factory(sensitivity=sensitivity)
+			detections, spent = detect(detector, audio)
+			detector.close()
+
+			falseAccepts += len(detections)
+			cpu += spent
+			seconds = len(audio) / 2 / sampleRate
+			negativeSeconds += seconds
+			audioSeconds += seconds
+
+	return {
+		'sensitivity'           : sensitivity,
+		'positives'             : positives,
+		'detected'              : detected,
+		'detectionRate'         : round(detected / positives, 4) if positives else None,
+		'falseAccepts'          : falseAccepts,
+		'negativeHours'         : round(negativeSeconds / 3600, 4),
+		'falseAcceptsPerHour'   : round(falseAccepts / (negativeSeconds / 3600), 3) if negativeSeconds else None,
+		'latencyMeanMs'         : round(statistics.mean(latencies) * 1000, 1) if latencies else None,
+		'latencyMedianMs'       : round(statistics.median(latencies) * 1000, 1) if latencies else None,
+		'latencyP90Ms'          : round(sorted(latencies)[math.ceil(len(latencies) * 0.9) - 1] * 1000, 1) if latencies else None,
+		'cpuSecondsPerAudioHour': round(cpu / audioSeconds * 3600, 2) if audioSeconds else None,
+		'realtimeFactor'        : round(audioSeconds / cpu, 1) if cpu else None
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Wakeword detection benchmark over a labeled wav corpus')
+	parser.add_argument('corpus', type=Path)
+	parser.add_argument('--engine', default='porcupine', help='Engine name, as in the wakewordEngine setting')
+	parser.add_argument('--detector', default=None, help='Any other detector, as module:Class')
+	parser.add_argument('--sensitivities', default='0.5', help='Comma separated wakewordSensitivity values to sweep')
+	parser.add_argument('--snr', type=float, default=None, help='Mix the noise beds under the positives at this SNR, in dB')
+	parser.add_argument('--output', type=Path, default=None, help='Json file to write the results to')
+	args = parser.parse_args()
+
+	factory = detectorClass(args.engine, args.detector)
+	results = list()
+	for sensitivity in (float(value) for value in args.sensitivities.split(',')):
+		result = run(args.corpus, factory, sensitivity, args.snr)
+		results.append(result)
+		print(
+			f'sensitivity {sensitivity:<5} detection {result["detectionRate"]}  false accepts/h {result["falseAcceptsPerHour"]}  '
+			f'latency {result["latencyMedianMs"]} ms  CPU {result["cpuSecondsPerAudioHour"]} s/h'
+		)
+
+	if args.output:
+		args.output.write_text(json.dumps({
+			'engine' : args.detector or args.engine,
+			'corpus' : str(args.corpus),
+			'snr'    : args.snr,
+			'machine': platform.machine(),
+			'date'   : time.strftime('%Y-%m-%d %H:%M:%S'),
+			'results': results
+		}, indent=4))
+
+
+if __name__ == '__main__':
+	main()
@@ -25,6 +25,7 @@ from pathlib import Path
 import requests
 import sounddevice as sd
 
+import core.base.SuperManager as SM
 from core.ProjectAliceExceptions import ConfigurationUpdateFailed, VitalConfigMissing
 from core.base.model.Manager import Manager
 
@@ -598,6 +599,11 @@ class ConfigManager(Manager):
 		self.MqttManager.reconnect()
 
 
+	@staticmethod
+	def updateProfilerSettings():
+		SM.SuperManager.getInstance().configureProfiler()
+
+
 	def checkNewAdminPinCode(self, pinCode: str) -> bool:
 		try:
 			pin = int(pinCode)
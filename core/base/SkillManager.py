@@ -5,12 +5,13 @@ import shutil
 import threading
 import traceback
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 from core.ProjectAliceExceptions import GithubNotFound, GithubRateLimit, GithubTokenFailed, SkillStartingFailed
 from core.base.model.AliceSkill import AliceSkill
 from core.base.model.FailedAliceSkill import FailedAliceSkill
 from core.base.model.Manager import Manager
+from core.base.model.ProjectAliceObject import ProjectAliceObject
 from core.base.model.Version import Version
 from core.commons import constants
 from core.util.Decorators import IfSetting, Online
@@ -40,6 +41,9 @@ class SkillManager(Manager):
 		self._deactivatedSkills: Dict[str, AliceSkill] = dict()
 		self._failedSkills: Dict[str, FailedAliceSkill] = dict()
 
+		# Event handler name: (skill name, bound handler, is the generic onEvent handler) of the active skills implementing it
+		self._skillHandlers: Dict[str, List[Tuple[str, Callable, bool]]] = dict()
+
 
 	def onStart(self):
 		super().onStart()
@@ -201,6 +205,8 @@ class SkillManager(Manager):
 				self._failedSkills[skillName] = FailedAliceSkill(data['installer'])
 				continue
 
+		self.invalidateSkillHandlers()
+
 
 	# noinspection PyTypeChecker
 	def instanciateSkill(self, skillName: str, skillResource: str = '', reload: bool = False) -> AliceSkill:
@@ -283,6 +289,8 @@ class SkillManager(Manager):
 				self._deactivatedSkills.pop(skillName, None)
 
 			self._failedSkills[skillName] = FailedAliceSkill(self._skillList[skillName]['installer'])
+		finally:
+			self.invalidateSkillHandlers()
 
 
 	def isSkillActive(self, skillName: str) -> bool:
@@ -303,7 +311,7 @@ class SkillManager(Manager):
 
 	def skillBroadcast(self, method: str, filterOut: list = None, **kwargs):
 		"""
-		Broadcasts a call to the given method on every skill
+		Broadcasts a call to the given method on every skill implementing it or a generic onEvent handler
 		:param filterOut: array, skills not to broadcast to
 		:param method: str, the method name to call on every skill
 		:return:
@@ -312,28 +320,52 @@ class SkillManager(Manager):
 		if not method.startswith('on'):
 			method = f'on{method[0].capitalize() + method[1:]}'
 
-		for skillName, skillInstance in self._activeSkills.items():
+		handlers = self._skillHandlers.get(method, None)
+		if handlers is None:
+			handlers = self._skillHandlers[method] = self._indexSkillHandlers(method)
 
+		for skillName, func, generic in handlers:
 			if filterOut and skillName in filterOut:
 				continue
 
 			try:
-				func = getattr(skillInstance, method, None)
-				if func:
-					func(**kwargs)
-
-				func = getattr(skillInstance, 'onEvent', None)
-				if func:
+				if generic:
 					func(event=method, **kwargs)
-
+				else:
+					func(**kwargs)
 			except TypeError as e:
 				self.logWarning(f'- Failed to broadcast event {method} to {skillName}: {e}')
 
 
+	def _indexSkillHandlers(self, method: str) -> List[Tuple[str, Callable, bool]]:
+		handlers = list()
+		default = getattr(ProjectAliceObject, method, None)
+		for skillName, skillInstance in self._activeSkills.items():
+			if method == 'onAudioFrame' and not skillInstance.AUDIO_FRAME_CONSUMER:
+				continue
+
+			implementation = getattr(type(skillInstance), method, None)
+			if implementation is not None and implementation is not default:
+				handlers.append((skillName, getattr(skillInstance, method), False))
+
+			if getattr(type(skillInstance), 'onEvent', None) is not None:
+				handlers.append((skillName, skillInstance.onEvent, True))
+
+		return handlers
+
+
+	def invalidateSkillHandlers(self):
+		"""
+		Must be called whenever the active skills change, the handler index is rebuilt lazily per event
+		"""
+		self._skillHandlers = dict()
+
+
 	def deactivateSkill(self, skillName: str, persistent: bool = False):
 		if skillName in self._activeSkills:
 			skillInstance = self._activeSkills.pop(skillName)
 			self._deactivatedSkills[skillName] = skillInstance
+			self.invalidateSkillHandlers()
 			skillInstance.onStop()
 
 			if persistent:
@@ -586,6 +618,7 @@ class SkillManager(Manager):
 		self._activeSkills.pop(skillName, None)
 		self._deactivatedSkills.pop(skillName, None)
 		self._failedSkills.pop(skillName, None)
+		self.invalidateSkillHandlers()
 
 		self.removeSkillFromDB(skillName=skillName)
 		shutil.rmtree(Path(self.Commons.rootDir(), 'skills', skillName))
@@ -608,6 +641,7 @@ class SkillManager(Manager):
 		self._activeSkills = dict()
 		self._deactivatedSkills = dict()
 		self._failedSkills = dict()
+		self.invalidateSkillHandlers()
 		self._loadSkills()
 
 
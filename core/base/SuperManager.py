@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.base.model.BroadcastProfiler import BroadcastProfiler
 from core.util.model.Logger import Logger
 
 
@@ -7,6 +10,23 @@ class SuperManager:
 	NAME = 'SuperManager'
 	_INSTANCE = None
 
+	# SuperManager attribute -> ProjectAliceObject attribute it is bound to
+	BINDINGS = {
+		'projectAlice'     : 'ProjectAlice',
+		'CommonsManager'   : 'Commons',
+		'ConfigManager'    : 'ConfigManager',
+		'DatabaseManager'  : 'DatabaseManager',
+		'ThreadManager'    : 'ThreadManager',
+		'MqttManager'      : 'MqttManager',
+		'TimeManager'      : 'TimeManager',
+		'NetworkManager'   : 'NetworkManager',
+		'HotwordManager'   : 'HotwordManager',
+		'SkillManager'     : 'SkillManager',
+		'AudioManager'     : 'AudioServer',
+		'WakewordManager'  : 'WakewordManager',
+		'SubprocessManager': 'SubprocessManager'
+	}
+
 
 	def __new__(cls, *args, **kwargs):
 		if not isinstance(SuperManager._INSTANCE, SuperManager):
@@ -18,6 +38,9 @@ class SuperManager:
 	def __init__(self, mainClass):
 		SuperManager._INSTANCE = self
 		self._managers = dict()
+		self._handlers: Dict[str, List[Tuple[str, Callable, Optional[str]]]] = dict()
+		self._methodNames: Dict[str, str] = dict()
+		self.profiler = BroadcastProfiler()
 
 		self.projectAlice = mainClass
 		self.Commons = None
@@ -36,6 +59,24 @@ class SuperManager:
 		self.SubprocessManager = None
 
 
+	def __setattr__(self, name: str, value):
+		super().__setattr__(name, value)
+		binding = self.BINDINGS.get(name, None)
+		if binding:
+			# Managers are bound as soon as they exist, the next ones' constructors already use them
+			from core.base.model.ProjectAliceObject import ProjectAliceObject
+
+			setattr(ProjectAliceObject, binding, value)
+
+
+	def bindManagers(self):
+		"""
+		Rebinds every manager reference of ProjectAliceObject to what SuperManager currently holds
+		"""
+		for name in self.BINDINGS:
+			setattr(self, name, getattr(self, name, None))
+
+
 	def onStart(self):
 		try:
 			commons = self._managers.pop('CommonsManager')
@@ -66,6 +107,7 @@ class SuperManager:
 			self._managers[databaseManager.name] = databaseManager
 			self._managers[mqttManager.name] = mqttManager
 			self._managers[networkManager.name] = networkManager
+			self.invalidateHandlers() # The managers were reordered
 		except Exception as e:
 			import traceback
 
@@ -116,6 +158,70 @@ class SuperManager:
 		self.SubprocessManager = SubprocessManager()
 
 		self._managers = {name: manager for name, manager in self.__dict__.items() if name.endswith('Manager')}
+		self.buildHandlers()
+		self.configureProfiler()
+
+
+	def configureProfiler(self):
+		self.profiler.sampleRate = self.ConfigManager.getAliceConfigByName('profilerSampleRate') or 0
+
+
+	def buildHandlers(self):
+		"""
+		Precomputes, for every event handler name, the managers that actually implement it. Broadcasting then only
+		loops over real subscribers instead of every manager
+		"""
+		self._handlers = dict()
+		names = {name for manager in self._managers.values() if manager for name in dir(type(manager)) if name.startswith('on')}
+		for name in names:
+			self._handlers[name] = self._findHandlers(name)
+
+
+	def _findHandlers(self, method: str) -> List[Tuple[str, Callable, Optional[str]]]:
+		from core.base.model.ProjectAliceObject import ProjectAliceObject
+
+		default = getattr(ProjectAliceObject, method, None)
+		handlers = list()
+		for name, manager in list(self._managers.items()):
+			if not manager:
+				del self._managers[name]
+				continue
+
+			if manager.name == 'ProjectAlice':
+				continue
+
+			implementation = getattr(type(manager), method, None)
+			if implementation is None or implementation is default:
+				continue
+
+			handlers.append((manager.name, getattr(manager, method), getattr(implementation, 'lane', None)))
+		return handlers
+
+
+	def handlersFor(self, method: str) -> List[Tuple[str, Callable, Optional[str]]]:
+		"""
+		:param method: handler name, as returned by methodName
+		:return: (manager name, bound handler, event lane or None) for each manager overriding the handler
+		"""
+		handlers = self._handlers.get(method, None)
+		if handlers is None:
+			handlers = self._handlers[method] = self._findHandlers(method)
+		return handlers
+
+
+	def methodName(self, event: str) -> str:
+		"""
+		Converts an event name to its handler name, 'audioFrame' to 'onAudioFrame'
+		"""
+		method = self._methodNames.get(event, None)
+		if method is None:
+			method = event if event.startswith('on') else f'on{event[0].capitalize() + event[1:]}'
+			self._methodNames[event] = method
+		return method
+
+
+	def invalidateHandlers(self):
+		self.buildHandlers()
 
 
 	def onStop(self):
@@ -162,6 +268,8 @@ class SuperManager:
 		managerInstance.onStop()
 		managerInstance.onStart()
 		managerInstance.onBooted()
+		self.bindManagers()
+		self.invalidateHandlers()
 
 
 	@property
@@ -13,6 +13,8 @@ from core.base.model.ProjectAliceObject import ProjectAliceObject
 
 class AliceSkill(ProjectAliceObject):
 
+	# Audio frames are only delivered to skills that ask for them
+	AUDIO_FRAME_CONSUMER = False
 
 	def __init__(self, databaseSchema: dict = None):
 		super().__init__()
@@ -0,0 +1,82 @@
+from typing import List, Optional, Union
+
+from core.commons import constants
+
+
+class BroadcastEvent:
+	"""
+	Base of the typed events handed to the hot broadcast handlers, as the `event` argument. Pooled events are only
+	valid for the duration of the broadcast, a handler keeping one must keep a copy
+	"""
+
+	__slots__ = ()
+
+	POOLED = False
+
+
+	def copy(self) -> 'BroadcastEvent':
+		return self
+
+
+class AudioFrameEvent(BroadcastEvent):
+	"""
+	A captured buffer of raw 16 bits mono PCM, handed over in process by the audio server
+	"""
+
+	__slots__ = ['payload', 'siteId', 'topic']
+
+	POOLED = True
+	POOL_SIZE = 8
+
+	_pool: List['AudioFrameEvent'] = list()
+
+
+	def __init__(self, payload: Union[bytes, bytearray] = None, siteId: str = '', topic: str = ''):
+		self.payload = payload
+		self.siteId = siteId
+		self.topic = topic
+
+
+	@classmethod
+	def acquire(cls, payload: Union[bytes, bytearray], siteId: str, topic: str) -> 'AudioFrameEvent':
+		try:
+			event = cls._pool.pop()
+		except IndexError:
+			return cls(payload=payload, siteId=siteId, topic=topic)
+
+		event.payload = payload
+		event.siteId = siteId
+		event.topic = topic
+		return event
+
+
+	def release(self):
+		self.payload = None
+		if len(self._pool) < self.POOL_SIZE:
+			self._pool.append(self)
+
+
+	def copy(self) -> 'AudioFrameEvent':
+		return AudioFrameEvent(payload=self.payload, siteId=self.siteId, topic=self.topic)
+
+
+class HotwordEvent(BroadcastEvent):
+
+	__slots__ = ['user', 'siteId']
+
+
+	def __init__(self, user: str = constants.UNKNOWN_USER, siteId: str = ''):
+		self.user = user
+		self.siteId = siteId
+
+
+class PlayBytesEvent(BroadcastEvent):
+
+	__slots__ = ['payload', 'deviceUid', 'sessionId', 'requestId']
+
+
+	def __init__(self, payload: Union[bytes, bytearray], deviceUid: str, sessionId: Optional[str] = None, requestId: Optional[str] = None):
+		self.payload = payload
+		self.deviceUid = deviceUid
+		self.sessionId = sessionId
+		self.requestId = requestId
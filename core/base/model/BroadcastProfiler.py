@@ -0,0 +1,97 @@
+import time
+from threading import Lock
+from typing import Callable, Dict, List, Tuple
+
+
+class BroadcastProfiler:
+	"""
+	Sampled timing of the event handlers broadcast reaches. Per (event, manager) it keeps the number of sampled
+	calls, their total and max duration and how many raised. With a sample rate of 0.01 one call in a hundred is
+	timed, the others only pay a counter decrement
+	"""
+
+	def __init__(self, sampleRate: float = 0):
+		self._lock = Lock()
+		self._stats: Dict[Tuple[str, str], List] = dict()
+		self._interval = 0
+		self._countdown = 0
+		self.sampleRate = sampleRate
+
+
+	@property
+	def sampleRate(self) -> float:
+		return 1 / self._interval if self._interval else 0
+
+
+	@sampleRate.setter
+	def sampleRate(self, value: float):
+		value = min(max(float(value or 0), 0), 1)
+		self._interval = round(1 / value) if value else 0
+		self._countdown = self._interval
+
+
+	@property
+	def enabled(self) -> bool:
+		return self._interval > 0
+
+
+	def sample(self) -> bool:
+		"""
+		Not locked, a lost decrement now and then only shifts which call gets sampled
+		"""
+		self._countdown -= 1
+		if self._countdown > 0:
+			return False
+
+		self._countdown = self._interval
+		return True
+
+
+	def call(self, event: str, manager: str, handler: Callable, kwargs: dict):
+		start = time.perf_counter()
+		failed = False
+		try:
+			return handler(**kwargs)
+		except:
+			failed = True
+			raise
+		finally:
+			self.record(event=event, manager=manager, duration=time.perf_counter() - start, failed=failed)
+
+
+	def record(self, event: str, manager: str, duration: float, failed: bool = False):
+		with self._lock:
+			stats = self._stats.get((event, manager), None)
+			if not stats:
+				stats = self._stats[(event, manager)] = [0, 0.0, 0.0, 0]
+
+			stats[0] += 1
+			stats[1] += duration
+			if duration > stats[2]:
+				stats[2] = duration
+			if failed:
+				stats[3] += 1
+
+
+	def report(self, reset: bool = False) -> List[dict]:
+		"""
+		:param reset: start a new measuring window
+		:return: one entry per (event, manager), most total time first. Times in milliseconds
+		"""
+		with self._lock:
+			stats = self._stats
+			if reset:
+				self._stats = dict()
+
+		report = [
+			{
+				'event'     : event,
+				'manager'   : manager,
+				'count'     : count,
+				'total'     : round(total * 1000, 3),
+				'mean'      : round(total * 1000 / count, 3),
+				'max'       : round(maximum * 1000, 3),
+				'exceptions': exceptions
+			} for (event, manager), (count, total, maximum, exceptions) in stats.items()
+		]
+		return sorted(report, key=lambda entry: entry['total'], reverse=True)
@@ -71,4 +71,4 @@ class HotwordDownloadThread(Thread):
 		finally:
 			sock.close()
 			os.remove(zipPath)
-			SuperManager.getInstance().WakewordManager.restartEngine()
+			SuperManager.getInstance().WakewordManager.hotSwapEngine()
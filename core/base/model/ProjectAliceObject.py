@@ -8,8 +8,8 @@ from importlib_metadata import PackageNotFoundError, version as packageVersion
 from typing import TYPE_CHECKING, Union
 
 import core.base.SuperManager as SM
+from core.base.model.BroadcastEvents import AudioFrameEvent, HotwordEvent, PlayBytesEvent
 from core.base.model.Version import Version
-from core.commons import constants
 from core.util.model.Logger import Logger
 
 
@@ -19,8 +19,11 @@ if TYPE_CHECKING:
 	from core.commons.CommonsManager import CommonsManager
 	from core.server.AudioServer import AudioManager
 	from core.server.MqttManager import MqttManager
+	from core.base.SkillManager import SkillManager
 	from core.util.DatabaseManager import DatabaseManager
+	from core.util.HotwordManager import HotwordManager
 	#from core.util.InternetManager import InternetManager
+	from core.util.NetworkManager import NetworkManager
 	from core.util.ThreadManager import ThreadManager
 	from core.util.TimeManager import TimeManager
 	from core.util.SubprocessManager import SubprocessManager
@@ -33,6 +36,21 @@ class ProjectAliceObject:
 		'pip'   : []
 	}
 
+	# Bound by SuperManager as it creates the managers, a single class attribute load on the hot paths
+	ProjectAlice: ProjectAlice = None
+	ConfigManager: ConfigManager = None
+	MqttManager: MqttManager = None
+	DatabaseManager: DatabaseManager = None
+	ThreadManager: ThreadManager = None
+	TimeManager: TimeManager = None
+	HotwordManager: HotwordManager = None
+	Commons: CommonsManager = None
+	NetworkManager: NetworkManager = None
+	SkillManager: SkillManager = None
+	WakewordManager: WakewordManager = None
+	AudioServer: AudioManager = None
+	SubprocessManager: SubprocessManager = None
+
 	def __init__(self, *args, **kwargs):
 		self._logger = Logger(*args, **kwargs)
 
@@ -59,31 +77,39 @@ class ProjectAliceObject:
 			self.logWarning('Cannot broadcast to itself, the calling method has to be put in exceptions')
 			return
 
-		if 'ProjectAlice' not in exceptions:
-			exceptions.append('ProjectAlice')
-
-		if not method.startswith('on'):
-			method = f'on{method[0].capitalize() + method[1:]}'
+		superManager = SM.SuperManager.getInstance()
+		method = superManager.methodName(method)
+		profiler = superManager.profiler
 
-		deadManagers = list()
-		for name, man in SM.SuperManager.getInstance().managers.items():
-			if not man:
-				deadManagers.append(name)
+		# Only managers overriding the handler are registered, see SuperManager.buildHandlers
+		for name, func, lane in superManager.handlersFor(method):
+			if (manager and name != manager.name) or name in exceptions:
 				continue
 
-			if (manager and man.name != manager.name) or man.name in exceptions:
+			sampled = profiler.enabled and profiler.sample()
+			if lane:
+				# Blocking handler, don't hold the broadcasting thread. Pooled events are recycled once the broadcast returns
+				laneKwargs = kwargs
+				event = kwargs.get('event', None)
+				if event is not None and event.POOLED:
+					laneKwargs = {**kwargs, 'event': event.copy()}
+
+				if sampled:
+					superManager.ThreadManager.dispatch(lane=lane, handler=profiler.call, kwargs={'event': method, 'manager': name, 'handler': func, 'kwargs': laneKwargs})
+				else:
+					superManager.ThreadManager.dispatch(lane=lane, handler=func, kwargs=laneKwargs)
 				continue
 
 			try:
-				func = getattr(man, method, None)
-				if func:
+				if sampled:
+					profiler.call(event=method, manager=name, handler=func, kwargs=kwargs)
+				else:
 					func(**kwargs)
-
 			except TypeError as e:
-				self.logWarning(f'- Failed to broadcast event {method} to {man.name}: {e}')
+				self.logWarning(f'- Failed to broadcast event {method} to {name}: {e}')
 
-		for name in deadManagers:
-			del SM.SuperManager.getInstance().managers[name]
+		if propagateToSkills and self.SkillManager:
+			self.SkillManager.skillBroadcast(method=method, filterOut=exceptions, **kwargs)
 
 
 	def checkDependencies(self) -> bool:
@@ -201,15 +227,15 @@ class ProjectAliceObject:
 		pass # Super object function is overridden only if needed
 
 
-	def onAudioFrame(self, **kwargs):
+	def onAudioFrame(self, event: AudioFrameEvent):
 		pass # Super object function is overridden only if needed
 
 
-	def onWakeword(self, user: str = constants.UNKNOWN_USER):
+	def onWakeword(self, event: HotwordEvent):
 		pass # Super object function is overridden only if needed
 
 
-	def onHotword(self, user: str = constants.UNKNOWN_USER):
+	def onHotword(self, event: HotwordEvent):
 		pass # Super object function is overridden only if needed
 
 
@@ -221,7 +247,7 @@ class ProjectAliceObject:
 		pass # Super object function is overridden only if needed
 
 
-	def onPlayBytes(self, payload: bytearray, deviceUid: str, sessionId: str = None):
+	def onPlayBytes(self, event: PlayBytesEvent):
 		pass # Super object function is overridden only if needed
 
 
@@ -253,64 +279,5 @@ class ProjectAliceObject:
 		pass # Super object function is overridden only if needed
 
 
-	@property
-	def ProjectAlice(self) -> ProjectAlice: #NOSONAR
-		return SM.SuperManager.getInstance().projectAlice
-
-
-	@property
-	def ConfigManager(self) -> ConfigManager: #NOSONAR
-		return SM.SuperManager.getInstance().ConfigManager
-
-
-	@property
-	def MqttManager(self) -> MqttManager: #NOSONAR
-		return SM.SuperManager.getInstance().MqttManager
-
-
-	@property
-	def DatabaseManager(self) -> DatabaseManager: #NOSONAR
-		return SM.SuperManager.getInstance().DatabaseManager
-
-
-	@property
-	def ThreadManager(self) -> ThreadManager: #NOSONAR
-		return SM.SuperManager.getInstance().ThreadManager
-
-
-	@property
-	def TimeManager(self) -> TimeManager: #NOSONAR
-		return SM.SuperManager.getInstance().TimeManager
-
-
-	@property
-	def HotwordManager(self) -> HotwordManager: #NOSONAR
-		return SM.SuperManager.getInstance().HotwordManager
-
-
-	@property
-	def Commons(self) -> CommonsManager: #NOSONAR
-		return SM.SuperManager.getInstance().CommonsManager
-
-
-	@property
-	def NetworkManager(self) -> NetworkManager: #NOSONAR
-		return SM.SuperManager.getInstance().NetworkManager
-
-
-	@property
-	def SkillManager(self) -> SkillManager: #NOSONAR
-		return SM.SuperManager.getInstance().SkillManager
-
-
-	@property
-	def WakewordManager(self) -> WakewordManager: #NOSONAR
-		return SM.SuperManager.getInstance().WakewordManager
-
-	@property
-	def AudioServer(self) -> AudioManager: #NOSONAR
-		return SM.SuperManager.getInstance().AudioManager
-
-	@property
-	def SubprocessManager(self) -> SubprocessManager:  # NOSONAR
-		return SM.SuperManager.getInstance().SubprocessManager
+	def onCoreDisconnected(self):
+		pass # Super object function is overridden only if needed
@@ -1,6 +1,5 @@
 import hashlib
 import inspect
-import json
 import random
 import socket
 import string
@@ -8,12 +7,13 @@ import subprocess
 from contextlib import contextmanager
 from ctypes import *
 from pathlib import Path
-from typing import Any
+from typing import Any, Union
 
 import requests
 from paho.mqtt.client import MQTTMessage
 
 from core.base.model.Manager import Manager
+from core.server.model.DecodedMessage import DecodedMessage
 
 
 class CommonsManager(Manager):
@@ -49,29 +49,13 @@ class CommonsManager(Manager):
 
 
 	@staticmethod
-	def payload(message: MQTTMessage) -> dict:
-		try:
-			payload = json.loads(message.payload)
-		except (ValueError, TypeError):
-			payload = dict()
-
-		if payload is True:
-			payload = {'true': True}
-		elif payload is False:
-			payload = {'false': False}
-
-		return payload
+	def payload(message: Union[MQTTMessage, DecodedMessage]) -> dict:
+		return DecodedMessage.fromMqtt(message).data
 
 
-	@classmethod
-	def parseSiteId(cls, message: MQTTMessage) -> str:
-		data = cls.payload(message)
-		if 'siteId' in data:
-			return data['siteId'].replace('_', ' ')
-		else:
-			from core.base.SuperManager import SuperManager
-
-			return data.get('IPAddress', SuperManager.getInstance().ConfigManager.getAliceConfigByName('uuid'))
+	@staticmethod
+	def parseSiteId(message: Union[MQTTMessage, DecodedMessage]) -> str:
+		return DecodedMessage.fromMqtt(message).siteId
 
 
 	@staticmethod
@@ -60,6 +60,7 @@ TOPIC_DEVICE_STATUS             = 'projectalice/devices/status'
 TOPIC_DISCONNECTING             = 'projectalice/devices/disconnection'
 TOPIC_DND                       = 'projectalice/devices/stopListen'
 TOPIC_NEW_HOTWORD               = 'projectalice/devices/alice/newHotword'
+TOPIC_PROFILER_REPORT           = 'projectalice/devices/profilerReport'
 TOPIC_STOP_DND                  = 'projectalice/devices/startListen'
 TOPIC_TOGGLE_DND                = 'projectalice/devices/toggleListen'
 
@@ -67,6 +68,7 @@ EVENT_ALICE_CONNECTION_ACCEPTED = 'aliceConnectionAccepted'
 EVENT_ALICE_CONNECTION_REFUSED  = 'aliceConnectionRefused'
 EVENT_AUDIO_FRAME               = 'audioFrame'
 EVENT_BOOTED                    = 'booted'
+EVENT_CORE_DISCONNECTED         = 'coreDisconnected'
 EVENT_DND_OFF                   = 'dndOff'
 EVENT_DND_ON                    = 'dndOn'
 EVENT_FIVE_MINUTE               = 'fiveMinute'
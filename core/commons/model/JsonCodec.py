@@ -0,0 +1,38 @@
+import json
+from typing import Any, Union
+
+try:
+	import orjson
+except ModuleNotFoundError:
+	orjson = None # Optional, stdlib json is used instead
+
+
+class JsonCodec:
+	"""
+	Json encoding and decoding for mqtt payloads. Uses orjson when it is installed and falls back to the stdlib.
+	Both backends produce the same compact utf-8 bytes, so what goes on the wire doesn't depend on what's installed
+	"""
+
+	BACKEND = 'orjson' if orjson else 'json'
+
+
+	@staticmethod
+	def dumps(data: Any) -> bytes:
+		if orjson:
+			try:
+				return orjson.dumps(data)
+			except TypeError:
+				pass # Non string keys or types orjson won't take, let the stdlib have a go
+
+		return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+	@staticmethod
+	def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+		if orjson:
+			return orjson.loads(data)
+
+		if isinstance(data, memoryview):
+			data = data.tobytes()
+
+		return json.loads(data)
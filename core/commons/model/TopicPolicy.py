@@ -0,0 +1,94 @@
+import paho.mqtt.client as mqtt
+from typing import Dict, List, Optional, Tuple
+
+from core.commons import constants
+
+
+class TopicPolicy:
+	"""
+	Delivery settings for a topic: qos and retain flag, broker side expiry in seconds (MQTT v5 only), and whether
+	the message goes to the outbox while the main unit is away, with how long it stays relevant there
+	"""
+
+	__slots__ = ['qos', 'retain', 'expiry', 'durable', 'ttl']
+
+	def __init__(self, qos: int = 0, retain: bool = False, expiry: Optional[int] = None, durable: bool = False, ttl: Optional[int] = None):
+		self.qos = qos
+		self.retain = retain
+		self.expiry = expiry
+		self.durable = durable
+		self.ttl = ttl
+
+
+	def __repr__(self) -> str:
+		return f'TopicPolicy(qos={self.qos}, retain={self.retain}, expiry={self.expiry}, durable={self.durable}, ttl={self.ttl})'
+
+
+class TopicPolicies:
+	"""
+	Declarative per topic delivery policies. Publishing and subscribing consult this table instead of picking qos
+	and retain flags at every call site
+	"""
+
+	AUDIO = TopicPolicy(qos=0, expiry=1)
+	CONTROL = TopicPolicy(qos=1)
+	# Not retained, the topic is shared by all the devices and a retained message would only hold the last one
+	STATUS = TopicPolicy(qos=1, durable=True)
+	HEARTBEAT = TopicPolicy(qos=0, expiry=5)
+	DEFAULT = TopicPolicy()
+
+	# First match wins, device specific topics use the mqtt single level wildcard in place of the uid
+	POLICIES: List[Tuple[str, TopicPolicy]] = [
+		(constants.TOPIC_AUDIO_FRAME.format('+'), AUDIO),
+		(constants.TOPIC_VAD_UP.format('+'), AUDIO),
+		(constants.TOPIC_VAD_DOWN.format('+'), AUDIO),
+		(constants.TOPIC_PLAY_BYTES.format('+'), CONTROL),
+		(constants.TOPIC_PLAY_BYTES_FINISHED.format('+'), CONTROL),
+		# A wake older than a couple of seconds would open a session nobody is talking to anymore
+		(constants.TOPIC_HOTWORD_DETECTED, TopicPolicy(qos=1, expiry=2, durable=True, ttl=2)),
+		(constants.TOPIC_DEVICE_STATUS, STATUS),
+		(constants.TOPIC_DEVICE_HEARTBEAT, HEARTBEAT),
+		(constants.TOPIC_CORE_HEARTBEAT, HEARTBEAT),
+		(constants.TOPIC_TTS_FINISHED, CONTROL),
+		(constants.TOPIC_ALICE_GREETING, CONTROL),
+		(constants.TOPIC_ALICE_CONNECTION_ACCEPTED, CONTROL),
+		(constants.TOPIC_ALICE_CONNECTION_REFUSED, CONTROL),
+		(constants.TOPIC_CORE_RECONNECTION, CONTROL),
+		(constants.TOPIC_CORE_DISCONNECTION, CONTROL),
+		(constants.TOPIC_DISCONNECTING, CONTROL),
+		(constants.TOPIC_NEW_HOTWORD, CONTROL),
+		(constants.TOPIC_DND, CONTROL),
+		(constants.TOPIC_STOP_DND, CONTROL),
+		(constants.TOPIC_TOGGLE_DND, CONTROL),
+		(constants.TOPIC_HOTWORD_TOGGLE_ON, CONTROL),
+		(constants.TOPIC_HOTWORD_TOGGLE_OFF, CONTROL)
+	]
+
+	_cache: Dict[str, TopicPolicy] = dict()
+
+
+	@classmethod
+	def forTopic(cls, topic: str) -> TopicPolicy:
+		"""
+		Returns the policy of the first pattern matching the topic, or the default qos 0 policy
+		"""
+		policy = cls._cache.get(topic, None)
+		if policy:
+			return policy
+
+		policy = cls.DEFAULT
+		for pattern, candidate in cls.POLICIES:
+			if pattern == topic or mqtt.topic_matches_sub(pattern, topic):
+				policy = candidate
+				break
+
+		cls._cache[topic] = policy
+		return policy
+
+
+	@classmethod
+	def subscriptions(cls, topics: List[str]) -> List[Tuple[str, int]]:
+		"""
+		Pairs each topic with the qos of its policy, as paho's subscribe expects
+		"""
+		return [(topic, cls.forTopic(topic).qos) for topic in topics]
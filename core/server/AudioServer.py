@@ -23,13 +23,18 @@ import uuid
 import wave
 
 import sounddevice as sd
-from typing import Dict, Optional, Union
+from typing import Callable, Dict, Optional, Tuple, Union
 # noinspection PyUnresolvedReferences
 from webrtcvad import Vad
 
 from core.ProjectAliceExceptions import PlayBytesStopped
+from core.base.model.BroadcastEvents import AudioFrameEvent, PlayBytesEvent
 from core.base.model.Manager import Manager
 from core.commons import constants
+from core.server.model.AudioFrame import AudioFrame
+from core.server.model.AudioFrameQueue import AudioFrameQueue
+from core.server.model.RtpAudio import RtpSender
+from core.util.Decorators import Lane
 from core.util.model.AliceEvent import AliceEvent
 
 
@@ -55,6 +60,11 @@ class AudioManager(Manager):
 		self._audioOutput = None
 
 		self._broadcastLocal = True
+		self._audioQueue: Optional[AudioFrameQueue] = None
+		self._frameSeq = 0
+		self._rtpSender: Optional[RtpSender] = None
+		self._frameConsumers: Tuple[Callable[[bytes], None], ...] = tuple()
+		self._frameSiteId = ''
 
 	def onStart(self):
 		super().onStart()
@@ -84,7 +94,17 @@ class AudioManager(Manager):
 		self.setDefaults()
 
 		self._stopPlayingFlag = self.ThreadManager.newEvent('stopPlaying')
-		self.MqttManager.mqttClient.subscribe(constants.TOPIC_AUDIO_FRAME.format(self.ConfigManager.getAliceConfigByName('uuid')))
+
+		self._audioQueue = AudioFrameQueue(
+			sender=self.sendAudioFrame,
+			maxSize=self.ConfigManager.getAliceConfigByName('audioQueueSize') or 25,
+			policy=self.ConfigManager.getAliceConfigByName('audioQueuePolicy')
+		)
+		self._audioQueue.start()
+		self.ThreadManager.newThread(name='audioFrameSender', target=self._audioQueue.run)
+
+		self._frameSiteId = self.ConfigManager.getAliceConfigByName('uuid')
+		self.addFrameConsumer(self.broadcastAudioFrame)
 
 
 	def onBooted(self):
@@ -101,11 +121,49 @@ class AudioManager(Manager):
 
 	def onStop(self):
 		super().onStop()
+		self.removeFrameConsumer(self.broadcastAudioFrame)
+		if self._audioQueue:
+			self._audioQueue.stop()
+
+		self.closeRtpSender()
+
 		if self._audioInputStream:
 			self._audioInputStream.stop(ignore_errors=True)
 			self._audioInputStream.close(ignore_errors=True)
 
 
+	def onAliceConnectionAccepted(self):
+		self.closeRtpSender()
+
+		if self.NetworkManager.audioTransport == self.NetworkManager.RTP:
+			try:
+				self._rtpSender = RtpSender(host=self.ConfigManager.getAliceConfigByName('mqttHost'), port=self.NetworkManager.rtpPort)
+			except OSError as e:
+				self.logError(f"Couldn't set up the rtp audio stream: {e}")
+
+
+	def onCoreDisconnected(self):
+		# Nobody listens anymore, a new sender is set up if the main unit accepts us again
+		self.closeRtpSender()
+
+
+	def closeRtpSender(self):
+		rtpSender = self._rtpSender
+		self._rtpSender = None
+		if rtpSender:
+			rtpSender.close()
+
+
+	def onFullMinute(self):
+		if not self._audioQueue:
+			return
+
+		stats = self._audioQueue.stats
+		if stats['dropped']:
+			self.logWarning(f'Dropped {stats["dropped"]} outbound audio frames over the last minute ({stats["policy"]}), max latency {stats["latencyMax"] * 1000:.0f}ms')
+		self._audioQueue.resetStats()
+
+
 	def onHotwordToggleOff(self):
 		self._broadcastLocal = False
 
@@ -121,7 +179,7 @@ class AudioManager(Manager):
 		self._waves[deviceUid].writeframes(frame)
 
 
-	def publishToListener(self, topic: str, payload: Union[dict, str, bytearray] = None, qos: int = 0, retain: bool = False):
+	def publishToListener(self, topic: str, payload: Union[dict, str, bytearray] = None, qos: int = None, retain: bool = None):
 		if self._broadcastLocal:
 			self.MqttManager.localPublish(topic=topic, payload=payload)
 		else:
@@ -181,17 +239,66 @@ class AudioManager(Manager):
 					else:
 						speechFrames = 0
 
+				for consumer in self._frameConsumers:
+					try:
+						consumer(frames)
+					except Exception as e:
+						self.logDebug(f'Frame consumer {consumer} failed: {e}')
+
 				self.publishAudioFrames(frames)
 			except Exception as e:
 				self.logDebug(f'Error publishing frame: {e}')
 
 
+	def addFrameConsumer(self, consumer: Callable[[bytes], None]):
+		"""
+		Registers an in process consumer of the captured audio, wakeword engines, recorders, meters. It is called
+		on the capture thread with each raw 16 bits mono PCM buffer, so it must return quickly
+		:param consumer:
+		"""
+		if consumer not in self._frameConsumers:
+			# Replaced rather than mutated, the capture thread iterates without locking
+			self._frameConsumers = self._frameConsumers + (consumer,)
+
+
+	def removeFrameConsumer(self, consumer: Callable[[bytes], None]):
+		self._frameConsumers = tuple(registered for registered in self._frameConsumers if registered != consumer)
+
+
+	def broadcastAudioFrame(self, pcm: bytes):
+		"""
+		Frame consumer handing the captured audio to the managers implementing onAudioFrame and to the skills opting
+		in with AUDIO_FRAME_CONSUMER, as a pooled event
+		:param pcm:
+		"""
+		event = AudioFrameEvent.acquire(payload=pcm, siteId=self._frameSiteId, topic=self.MqttManager.audioFrameTopic)
+		try:
+			self.broadcast(method=constants.EVENT_AUDIO_FRAME, exceptions=[self.name], propagateToSkills=True, event=event)
+		finally:
+			event.release()
+
+
 	def publishAudioFrames(self, frames: bytes):
 		"""
-		receives some audio frames, adds them to the buffer and publishes them to MQTT
+		receives some audio frames, adds them to the buffer and publishes them to MQTT. Frames for the main unit
+		use the compact framing if it was negotiated at greeting. In process consumers got the frames already, the
+		local broker only gets Hermes' wav frames if an external consumer registered for them
 		:param frames:
 		:return:
 		"""
+		if self._broadcastLocal and not self.MqttManager.hasLocalBrokerConsumer(self.MqttManager.audioFrameTopic):
+			return
+
+		self._frameSeq += 1
+		rtpSender = self._rtpSender
+		if not self._broadcastLocal and rtpSender:
+			rtpSender.send(pcm=frames, samples=len(frames) // 2)
+			return
+
+		if not self._broadcastLocal and self.NetworkManager.audioFormat == AudioFrame.COMPACT:
+			self._audioQueue.put(topic=self.MqttManager.audioFrameTopic, payload=AudioFrame.encode(pcm=frames, seq=self._frameSeq))
+			return
+
 		with io.BytesIO() as buffer:
 			with wave.open(buffer, 'wb') as wav:
 				wav.setnchannels(1)
@@ -199,16 +306,25 @@ class AudioManager(Manager):
 				wav.setframerate(self.SAMPLERATE)
 				wav.writeframes(frames)
 
-			audioFrames = buffer.getvalue()
+			if self._broadcastLocal:
+				self.MqttManager.localPublish(topic=self.MqttManager.audioFrameTopic, payload=buffer.getvalue())
+			else:
+				self._audioQueue.put(topic=self.MqttManager.audioFrameTopic, payload=buffer.getvalue())
 
-			self.publishToListener(topic=constants.TOPIC_AUDIO_FRAME.format(self.ConfigManager.getAliceConfigByName('uuid')), payload=bytearray(audioFrames))
 
+	def sendAudioFrame(self, topic: str, payload: bytes):
+		return self.MqttManager.publish(topic=topic, payload=payload)
 
-	def onPlayBytes(self, payload: bytearray, deviceUid: str, sessionId: str = None, requestId: str = None):
-		if deviceUid != self.ConfigManager.getAliceConfigByName('uuid'):
+
+	@Lane('playback')
+	def onPlayBytes(self, event: PlayBytesEvent):
+		if event.deviceUid != self.ConfigManager.getAliceConfigByName('uuid'):
 			return
 
-		requestId = requestId or sessionId or str(uuid.uuid4())
+		payload = event.payload
+		deviceUid = event.deviceUid
+		sessionId = event.sessionId
+		requestId = event.requestId or sessionId or str(uuid.uuid4())
 
 		self._playing = True
 		with io.BytesIO(payload) as buffer:
@@ -288,3 +404,8 @@ class AudioManager(Manager):
 	@property
 	def isPlaying(self) -> bool:
 		return self._playing
+
+
+	@property
+	def audioQueueStats(self) -> dict:
+		return self._audioQueue.stats if self._audioQueue else dict()
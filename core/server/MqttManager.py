@@ -1,31 +1,92 @@
-import json
+import time
 import traceback
+from threading import Lock, Thread
 
 import paho.mqtt.client as mqtt
-from typing import Union
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+from paho.mqtt.reasoncodes import ReasonCodes
+from typing import Optional, Union
 
+import core.base.SuperManager as SM
+from core.base.model.BroadcastEvents import HotwordEvent, PlayBytesEvent
 from core.base.model.Manager import Manager
 from core.base.model.States import State
 from core.commons import constants
+from core.commons.model.JsonCodec import JsonCodec
+from core.commons.model.TopicPolicy import TopicPolicies
+from core.server.model.AsyncioMqttTransport import AsyncioMqttTransport
+from core.server.model.DecodedMessage import DecodedMessage
+from core.server.model.LoopbackBus import LoopbackBus
+from core.server.model.ReconnectSupervisor import ReconnectSupervisor
 
 
 class MqttManager(Manager):
 
+	DATABASE = {
+		'outbox': [
+			'id INTEGER PRIMARY KEY AUTOINCREMENT',
+			'topic TEXT NOT NULL',
+			'payload BLOB',
+			'qos INTEGER NOT NULL DEFAULT 0',
+			'retain INTEGER NOT NULL DEFAULT 0',
+			'expiresAt REAL NOT NULL'
+		]
+	}
+
+	OUTBOX_BATCH_SIZE = 20
+
+	LOCAL_RECONNECT_MIN_DELAY = 0.5
+	LOCAL_RECONNECT_MAX_DELAY = 5
+
+	UNSUPPORTED_PROTOCOL_VERSION = 132
+
 	def __init__(self):
-		super().__init__()
-		self._mqttClient = mqtt.Client()
+		super().__init__(databaseSchema=self.DATABASE)
+		self._mainProtocol = mqtt.MQTTv5 if str(self.ConfigManager.getAliceConfigByName('mqttProtocol')) == '5' else mqtt.MQTTv311
+		self._mqttClient = mqtt.Client(protocol=self._mainProtocol)
 		self._mqttLocalClient = mqtt.Client()
+		self._topicAliases = dict()
+		self._topicAliasMaximum = 0
+		self._topicAliasLock = Lock()
+		self._loopback = LoopbackBus()
+		self._transport: Optional[AsyncioMqttTransport] = None
+		self._outboxThread: Optional[Thread] = None
+		self._mainSupervisor = ReconnectSupervisor(
+			name='main',
+			minDelay=self.ConfigManager.getAliceConfigByName('mqttReconnectMinDelay') or 1,
+			maxDelay=self.ConfigManager.getAliceConfigByName('mqttReconnectMaxDelay') or 60
+		)
+		self._localSupervisor = ReconnectSupervisor(name='local', minDelay=self.LOCAL_RECONNECT_MIN_DELAY, maxDelay=self.LOCAL_RECONNECT_MAX_DELAY)
+		self._localBrokerConsumers = set()
 		self._dnd = False
 		self._audioFrameTopic = constants.TOPIC_AUDIO_FRAME.replace('{}', self.ConfigManager.getAliceConfigByName('uuid'))
 
 	def onStart(self):
 		super().onStart()
 
+		if self.ConfigManager.getAliceConfigByName('mqttTransport') == 'asyncio':
+			self._transport = AsyncioMqttTransport()
+			self.ThreadManager.newThread(name='mqttEventLoop', target=self._transport.run)
+
+		self._setupMainClient()
+		self._setupLocalClient()
+
+		self._loopback.subscribe(constants.TOPIC_HOTWORD_DETECTED, self.onHotwordDetected)
+
+		if self.ConfigManager.getAliceConfigByName('uuid'):
+			self.connect()
+
+
+	def _setupMainClient(self):
+		if self._transport:
+			self._transport.attach(self._mqttClient, self._mainSupervisor)
+
 		self._mqttClient.on_message = self.onMqttMessage
-		self._mqttLocalClient.on_message = self.onMqttMessage
 		self._mqttClient.on_connect = self.onConnect
+		self._mqttClient.on_disconnect = self.onDisconnect
+		self._mqttClient.on_connect_fail = self.onConnectFail
 		self._mqttClient.on_log = self.onLog
-		self._mqttLocalClient.on_log = self.onLog
 
 		self._mqttClient.message_callback_add(constants.TOPIC_NEW_HOTWORD, self.onNewHotword)
 		self._mqttClient.message_callback_add(constants.TOPIC_CORE_DISCONNECTION, self.onCoreDisconnection)
@@ -33,12 +94,20 @@ class MqttManager(Manager):
 		self._mqttClient.message_callback_add(constants.TOPIC_CORE_HEARTBEAT, self.onCoreHeartbeat)
 		self._mqttClient.message_callback_add(constants.TOPIC_HOTWORD_TOGGLE_ON, self.hotwordToggleOn)
 		self._mqttClient.message_callback_add(constants.TOPIC_HOTWORD_TOGGLE_OFF, self.hotwordToggleOff)
-		self._mqttLocalClient.message_callback_add(constants.TOPIC_HOTWORD_DETECTED, self.onHotwordDetected)
-		self._mqttLocalClient.message_callback_add(self._audioFrameTopic, self.onAudioFrameTopic)
 		self._mqttClient.message_callback_add(constants.TOPIC_PLAY_BYTES.format(self.ConfigManager.getAliceConfigByName('uuid')), self.topicPlayBytes)
 
-		if self.ConfigManager.getAliceConfigByName('uuid'):
-			self.connect()
+
+	def _setupLocalClient(self):
+		if self._transport:
+			self._transport.attach(self._mqttLocalClient, self._localSupervisor)
+
+		self._mqttLocalClient.on_message = self.onMqttMessage
+		self._mqttLocalClient.on_connect = self.onLocalConnect
+		self._mqttLocalClient.on_disconnect = self.onDisconnect
+		self._mqttLocalClient.on_connect_fail = self.onConnectFail
+		self._mqttLocalClient.on_log = self.onLog
+
+		self._mqttLocalClient.message_callback_add(constants.TOPIC_HOTWORD_DETECTED, self.onHotwordDetected)
 
 
 	def onBooted(self):
@@ -55,6 +124,42 @@ class MqttManager(Manager):
 		super().onStop()
 		self.disconnect()
 
+		if self._transport:
+			self._transport.stop()
+			self._transport = None
+
+
+	def onFiveMinute(self):
+		self.reportProfiler()
+
+
+	def reportProfiler(self):
+		"""
+		Reports the broadcast handler timings of the last window, to the log or to the main unit
+		"""
+		profiler = SM.SuperManager.getInstance().profiler
+		if not profiler.enabled:
+			return
+
+		report = profiler.report(reset=True)
+		if not report:
+			return
+
+		if self.ConfigManager.getAliceConfigByName('profilerReport') == 'mqtt':
+			self.publish(
+				topic=constants.TOPIC_PROFILER_REPORT,
+				payload={
+					'uid'       : self.ConfigManager.getAliceConfigByName('uuid'),
+					'sampleRate': profiler.sampleRate,
+					'handlers'  : report
+				}
+			)
+			return
+
+		self.logInfo(f'Broadcast handler timings, sampled at {profiler.sampleRate:.2%}, times in ms:')
+		for entry in report:
+			self.logInfo(f'  {entry["event"]} -> {entry["manager"]}: {entry["count"]} calls, total {entry["total"]}, mean {entry["mean"]}, max {entry["max"]}, {entry["exceptions"]} exception(s)')
+
 
 	# noinspection PyUnusedLocal
 	def onLog(self, client, userdata, level, buf):
@@ -63,31 +168,112 @@ class MqttManager(Manager):
 
 
 	# noinspection PyUnusedLocal
-	def onConnect(self, client, userdata, flags, rc):
+	def onConnect(self, client, userdata, flags, rc, properties: Properties = None):
+		if not self._connected(client, rc):
+			return
+
+		with self._topicAliasLock:
+			# Topic aliases only live as long as the connection
+			self._topicAliases = dict()
+			self._topicAliasMaximum = getattr(properties, 'TopicAliasMaximum', 0) if properties else 0
+
 		subscribedEvents = [
-			(constants.TOPIC_NEW_HOTWORD, 0),
-			(constants.TOPIC_ALICE_CONNECTION_ACCEPTED, 0),
-			(constants.TOPIC_ALICE_CONNECTION_REFUSED, 0),
-			(constants.TOPIC_CORE_RECONNECTION, 0),
-			(constants.TOPIC_CORE_DISCONNECTION, 0),
-			(constants.TOPIC_CORE_HEARTBEAT, 0),
-			(constants.TOPIC_DND, 0),
-			(constants.TOPIC_STOP_DND, 0),
-			(constants.TOPIC_TOGGLE_DND, 0),
-			(constants.TOPIC_HOTWORD_TOGGLE_ON, 0),
-			(constants.TOPIC_HOTWORD_TOGGLE_OFF, 0),
-			(constants.TOPIC_CORE_HEARTBEAT, 0),
-			(constants.TOPIC_PLAY_BYTES.format(self.ConfigManager.getAliceConfigByName('uuid')), 0)
+			constants.TOPIC_NEW_HOTWORD,
+			constants.TOPIC_ALICE_CONNECTION_ACCEPTED,
+			constants.TOPIC_ALICE_CONNECTION_REFUSED,
+			constants.TOPIC_CORE_RECONNECTION,
+			constants.TOPIC_CORE_DISCONNECTION,
+			constants.TOPIC_CORE_HEARTBEAT,
+			constants.TOPIC_DND,
+			constants.TOPIC_STOP_DND,
+			constants.TOPIC_TOGGLE_DND,
+			constants.TOPIC_HOTWORD_TOGGLE_ON,
+			constants.TOPIC_HOTWORD_TOGGLE_OFF,
+			constants.TOPIC_PLAY_BYTES.format(self.ConfigManager.getAliceConfigByName('uuid'))
 		]
 
-		self._mqttClient.subscribe(subscribedEvents)
-		self._mqttLocalClient.subscribe(constants.TOPIC_HOTWORD_DETECTED)
-		self._mqttLocalClient.subscribe(self._audioFrameTopic)
+		self._mqttClient.subscribe(TopicPolicies.subscriptions(subscribedEvents))
 
 		self.NetworkManager.tryConnectingToAlice()
 
 
+	# noinspection PyUnusedLocal
+	def onLocalConnect(self, client, userdata, flags, rc):
+		if not self._connected(client, rc):
+			return
+
+		self._mqttLocalClient.subscribe(constants.TOPIC_HOTWORD_DETECTED)
+
+
+	def _connected(self, client: mqtt.Client, rc: Union[int, ReasonCodes]) -> bool:
+		supervisor = self._supervisor(client)
+		if client is self._mqttClient and self._mainProtocol == mqtt.MQTTv5 and rc == self.UNSUPPORTED_PROTOCOL_VERSION:
+			self.logWarning('The main broker does not support MQTT v5, falling back to MQTT 3.1.1')
+			self.ThreadManager.doLater(interval=0, func=self._fallbackToMqtt311)
+			return False
+
+		if rc != mqtt.CONNACK_ACCEPTED:
+			self.logWarning(f'Connection to the {supervisor.name} broker refused: {rc if isinstance(rc, ReasonCodes) else mqtt.connack_string(rc)}')
+			supervisor.failed()
+			self._applyBackoff(client)
+			return False
+
+		downtime = supervisor.connected()
+		if downtime is not None:
+			self.logInfo(f'Reconnected to the {supervisor.name} broker after {downtime:.1f} seconds')
+		return True
+
+
+	def _fallbackToMqtt311(self):
+		if self._mainProtocol != mqtt.MQTTv5:
+			return
+
+		self._mainProtocol = mqtt.MQTTv311
+		self._disconnectMain()
+
+		self._mqttClient = mqtt.Client(protocol=self._mainProtocol)
+		self._setupMainClient()
+		self._connectMain()
+
+
+	# noinspection PyUnusedLocal
+	def onDisconnect(self, client, userdata, rc, properties: Properties = None):
+		supervisor = self._supervisor(client)
+		supervisor.disconnected()
+
+		if rc != mqtt.MQTT_ERR_SUCCESS:
+			self.logWarning(f'Lost connection to the {supervisor.name} broker')
+			self._applyBackoff(client)
+
+
+	# noinspection PyUnusedLocal
+	def onConnectFail(self, client, userdata):
+		self._supervisor(client).failed()
+		self._applyBackoff(client)
+
+
+	def _supervisor(self, client: mqtt.Client) -> ReconnectSupervisor:
+		return self._localSupervisor if client is self._mqttLocalClient else self._mainSupervisor
+
+
+	def _applyBackoff(self, client: mqtt.Client):
+		"""
+		Paho's own loop thread reconnects using its reconnect delay, feed it our jittered one.
+		The asyncio transport asks the supervisor itself
+		"""
+		if self._transport:
+			return
+
+		delay = self._supervisor(client).nextDelay()
+		client.reconnect_delay_set(min_delay=delay, max_delay=delay)
+
+
 	def connect(self):
+		self._connectMain()
+		self._connectLocal()
+
+
+	def _connectMain(self):
 		if self.ConfigManager.getAliceConfigByName('mqttUser') and self.ConfigManager.getAliceConfigByName('mqttPassword'):
 			self._mqttClient.username_pw_set(self.ConfigManager.getAliceConfigByName('mqttUser'), self.ConfigManager.getAliceConfigByName('mqttPassword'))
 
@@ -95,18 +281,50 @@ class MqttManager(Manager):
 			self._mqttClient.tls_set(certfile=self.ConfigManager.getAliceConfigByName('mqttTLSFile'))
 			self._mqttClient.tls_insecure_set(False)
 
-		self._mqttClient.connect(self.ConfigManager.getAliceConfigByName('mqttHost'), int(self.ConfigManager.getAliceConfigByName('mqttPort')))
+		if self._transport:
+			self._transport.connect(self._mqttClient, self.ConfigManager.getAliceConfigByName('mqttHost'), int(self.ConfigManager.getAliceConfigByName('mqttPort')))
+			return
+
+		# Async connections let paho's loop thread retry a broker that isn't up yet, with our backoff
+		self._applyBackoff(self._mqttClient)
+		self._mqttClient.connect_async(self.ConfigManager.getAliceConfigByName('mqttHost'), int(self.ConfigManager.getAliceConfigByName('mqttPort')))
 		self._mqttClient.loop_start()
 
-		self._mqttLocalClient.connect(host='127.0.0.1')
+
+	def _connectLocal(self):
+		if self._transport:
+			self._transport.connect(self._mqttLocalClient, '127.0.0.1')
+			return
+
+		self._applyBackoff(self._mqttLocalClient)
+		self._mqttLocalClient.connect_async(host='127.0.0.1')
 		self._mqttLocalClient.loop_start()
 
 
 	def disconnect(self):
+		self._disconnectMain()
+		self._disconnectLocal()
+
+
+	def _disconnectMain(self):
+		if self._transport:
+			self._transport.disconnect(self._mqttClient)
+			return
+
 		try:
 			self._mqttClient.loop_stop()
 			self._mqttClient.disconnect()
+		except:
+			# Do nothing, we are certainly not connected
+			pass
 
+
+	def _disconnectLocal(self):
+		if self._transport:
+			self._transport.disconnect(self._mqttLocalClient)
+			return
+
+		try:
 			self._mqttLocalClient.loop_stop()
 			self._mqttLocalClient.disconnect()
 		except:
@@ -121,21 +339,12 @@ class MqttManager(Manager):
 
 	def onMqttMessage(self, _client, _userdata, message: mqtt.MQTTMessage):
 		try:
+			message = DecodedMessage.fromMqtt(message)
 			statusName = ''
 			statusValue = ''
-			if message.topic == self._audioFrameTopic and not self._dnd:
-				self.broadcast(
-					method=constants.EVENT_AUDIO_FRAME,
-					exceptions=[self.name],
-					propagateToSkills=True,
-					message=message,
-					siteId=message.topic.replace('hermes/audioServer/', '').replace('/audioFrame', '')
-				)
-				return
 
-			siteId = self.Commons.parseSiteId(message) # Must keep for Hermes compatibility
-			payload = self.Commons.payload(message)
-			uid = payload.get('uid', None)
+			siteId = message.siteId # Must keep for Hermes compatibility
+			uid = message.uid
 
 			if uid:
 				if uid != self.ConfigManager.getAliceConfigByName('uuid'):
@@ -152,7 +361,7 @@ class MqttManager(Manager):
 
 
 			if message.topic == constants.TOPIC_ALICE_CONNECTION_ACCEPTED:
-				self.NetworkManager.onAliceConnectionAccepted()
+				self.NetworkManager.onAliceConnectionAccepted(payload=message.data)
 				self.broadcast(method=constants.EVENT_ALICE_CONNECTION_ACCEPTED, exceptions=[self.NetworkManager.name], propagateToSkills=True)
 				self.publish(
 					topic=constants.TOPIC_CLEAR_LEDS,
@@ -232,7 +441,7 @@ class MqttManager(Manager):
 
 
 	def onNewHotword(self, _client, _userdata, message: mqtt.MQTTMessage):
-		payload = self.Commons.payload(message)
+		payload = DecodedMessage.fromMqtt(message).data
 		if 'uid' not in payload or payload['uid'] != self.ConfigManager.getAliceConfigByName('uuid'):
 			return
 
@@ -253,16 +462,6 @@ class MqttManager(Manager):
 		)
 
 
-	def onAudioFrameTopic(self, _client, _data, msg: mqtt.MQTTMessage):
-		self.broadcast(
-			method=constants.EVENT_AUDIO_FRAME,
-			exceptions=[self.name],
-			propagateToSkills=True,
-			message=msg,
-			siteId=msg.topic.replace('hermes/audioServer/', '').replace('/audioFrame', '')
-		)
-
-
 	def topicPlayBytes(self, _client, _data, msg: mqtt.MQTTMessage):
 		"""
 		SessionId is completely custom and does not belong in the Hermes Protocol
@@ -274,7 +473,7 @@ class MqttManager(Manager):
 		sessionId = msg.topic.rsplit('/')[-1]
 		deviceUid = msg.topic.rsplit('/')[-3]
 
-		self.broadcast(method=constants.EVENT_PLAY_BYTES, exceptions=self.name, propagateToSkills=True, payload=msg.payload, deviceUid=deviceUid, sessionId=sessionId)
+		self.broadcast(method=constants.EVENT_PLAY_BYTES, exceptions=self.name, propagateToSkills=True, event=PlayBytesEvent(payload=msg.payload, deviceUid=deviceUid, sessionId=sessionId))
 
 
 	def hotwordToggleOn(self, _client, _data, msg: mqtt.MQTTMessage):
@@ -286,13 +485,16 @@ class MqttManager(Manager):
 		:param msg:
 		:return:
 		"""
+		msg = DecodedMessage.fromMqtt(msg)
 		if not self.isForMe(msg):
 			return
+
 		self.localPublish(topic=msg.topic, payload=msg.payload)
 		self.broadcast(method=constants.EVENT_HOTWORD_TOGGLE_ON, exceptions=[self.name], propagateToSkills=True)
 
 
 	def hotwordToggleOff(self, _client, _data, msg: mqtt.MQTTMessage):
+		msg = DecodedMessage.fromMqtt(msg)
 		if not self.isForMe(msg):
 			return
 
@@ -308,7 +510,7 @@ class MqttManager(Manager):
 		:param msg:
 		:return:
 		"""
-		payload = self.Commons.payload(msg)
+		payload = DecodedMessage.fromMqtt(msg).data
 
 		user = constants.UNKNOWN_USER
 		if payload['modelType'] == 'personal':
@@ -325,26 +527,203 @@ class MqttManager(Manager):
 			}
 		)
 
+		event = HotwordEvent(user=user, siteId=self.ConfigManager.getAliceConfigByName('uuid'))
 		if user == constants.UNKNOWN_USER:
-			self.broadcast(method=constants.EVENT_HOTWORD, exceptions=[self.name], propagateToSkills=True, user=user)
+			self.broadcast(method=constants.EVENT_HOTWORD, exceptions=[self.name], propagateToSkills=True, event=event)
 		else:
-			self.broadcast(method=constants.EVENT_WAKEWORD, exceptions=[self.name], propagateToSkills=True, user=user)
+			self.broadcast(method=constants.EVENT_WAKEWORD, exceptions=[self.name], propagateToSkills=True, event=event)
 
 
 	def onCoreHeartbeat(self, _client, _userdata, _message: mqtt.MQTTMessage):
 		self.NetworkManager.coreHeartbeat()
 
 
-	def publish(self, topic: str, payload: Union[dict, str] = None, qos: int = 0, retain: bool = False):
+	def publish(self, topic: str, payload: Union[dict, str, bytes] = None, qos: int = None, retain: bool = None, durable: bool = None, ttl: int = None) -> Optional[mqtt.MQTTMessageInfo]:
+		"""
+		Publishes on the main broker. Anything not given is taken from the topic's policy, see TopicPolicies
+		:param topic:
+		:param payload:
+		:param qos:
+		:param retain:
+		:param durable: If the link to the main unit is down, keep the message in the outbox and send it once the main unit is back
+		:param ttl: Seconds a durable message stays relevant, defaults to the outbox max age
+		:return: None if the message went to the outbox
+		"""
+		policy = TopicPolicies.forTopic(topic)
+		qos = policy.qos if qos is None else qos
+		retain = policy.retain if retain is None else retain
+		durable = policy.durable if durable is None else durable
+		ttl = policy.ttl if ttl is None else ttl
+
 		if isinstance(payload, dict):
-			payload = json.dumps(payload)
+			payload = JsonCodec.dumps(payload)
+
+		if durable and not self.linkUp:
+			self.storeInOutbox(topic=topic, payload=payload, qos=qos, retain=retain, ttl=ttl)
+			return None
+
+		if not self._mqttClient.is_connected():
+			self._mainSupervisor.dropped()
+
+		if self._mainProtocol == mqtt.MQTTv5:
+			return self._publishV5(topic=topic, payload=payload, qos=qos, retain=retain, expiry=policy.expiry)
+
+		return self._mqttClient.publish(topic, payload, qos, retain)
+
+
+	def _publishV5(self, topic: str, payload: Union[str, bytes] = None, qos: int = 0, retain: bool = False, expiry: int = None) -> mqtt.MQTTMessageInfo:
+		"""
+		Messages expire on the broker if they can't be delivered in time, and the audio frame topic is replaced by
+		a topic alias after its first publish on a connection
+		"""
+		properties = None
+		if expiry:
+			properties = Properties(PacketTypes.PUBLISH)
+			properties.MessageExpiryInterval = expiry
+
+		if topic != self._audioFrameTopic:
+			return self._mqttClient.publish(topic, payload, qos, retain, properties)
+
+		properties = properties or Properties(PacketTypes.PUBLISH)
+
+		with self._topicAliasLock:
+			alias = self._topicAliases.get(topic, None)
+			if alias:
+				properties.TopicAlias = alias
+				return self._mqttClient.publish('', payload, qos, retain, properties)
+
+			if len(self._topicAliases) < self._topicAliasMaximum:
+				alias = len(self._topicAliases) + 1
+				self._topicAliases[topic] = alias
+				properties.TopicAlias = alias
+
+			# Full topic with the alias, the lock keeps alias only publishes from being queued before this one
+			return self._mqttClient.publish(topic, payload, qos, retain, properties)
+
+
+	def storeInOutbox(self, topic: str, payload: Union[str, bytes] = None, qos: int = 0, retain: bool = False, ttl: int = None):
+		maxAge = int(self.ConfigManager.getAliceConfigByName('outboxMaxAge') or 600)
+		ttl = min(ttl, maxAge) if ttl else maxAge
+
+		try:
+			self.databaseInsert(
+				tableName='outbox',
+				values={
+					'topic'    : topic,
+					'payload'  : payload,
+					'qos'      : qos,
+					'retain'   : 1 if retain else 0,
+					'expiresAt': time.time() + ttl
+				}
+			)
+		except Exception as e:
+			self.logWarning(f'Failed storing message for --{topic}-- in the outbox: {e}')
+			return
+
+		self.pruneOutbox()
+
+
+	def pruneOutbox(self):
+		"""
+		Drops expired messages and the oldest ones above the configured outbox size
+		"""
+		self.DatabaseManager.delete(
+			tableName='outbox',
+			callerName=self.name,
+			query='DELETE FROM :__table__ WHERE expiresAt < :now',
+			values={'now': time.time()}
+		)
+
+		self.DatabaseManager.delete(
+			tableName='outbox',
+			callerName=self.name,
+			query='DELETE FROM :__table__ WHERE id NOT IN (SELECT id FROM :__table__ ORDER BY id DESC LIMIT :maxSize)',
+			values={'maxSize': int(self.ConfigManager.getAliceConfigByName('outboxMaxSize') or 200)}
+		)
+
+
+	def flushOutbox(self):
+		if not self._outboxThread or not self._outboxThread.is_alive():
+			self._outboxThread = self.ThreadManager.newThread(name='outboxFlush', target=self._flushOutbox)
+
+
+	def _flushOutbox(self):
+		self.pruneOutbox()
+
+		sent = 0
+		while self.linkUp:
+			rows = self.databaseFetch(
+				tableName='outbox',
+				query='SELECT * FROM :__table__ ORDER BY id LIMIT :batchSize',
+				values={'batchSize': self.OUTBOX_BATCH_SIZE},
+				method='all'
+			)
+
+			if not rows:
+				break
 
-		self._mqttClient.publish(topic, payload, qos, retain)
+			lastId = None
+			now = time.time()
+			for row in rows:
+				if not self.linkUp:
+					break
 
+				lastId = row['id']
+				if row['expiresAt'] < now:
+					continue
 
-	def localPublish(self, topic: str, payload: Union[dict, str] = None):
+				self._mqttClient.publish(row['topic'], row['payload'], row['qos'], bool(row['retain']))
+				sent += 1
+
+			if lastId is None:
+				break
+
+			self.DatabaseManager.delete(
+				tableName='outbox',
+				callerName=self.name,
+				query='DELETE FROM :__table__ WHERE id <= :lastId',
+				values={'lastId': lastId}
+			)
+			time.sleep(0.05)
+
+		if sent:
+			self.logInfo(f'Flushed {sent} message(s) from the outbox')
+
+
+	async def publishAsync(self, topic: str, payload: Union[dict, str, bytes] = None, qos: int = None, retain: bool = None) -> mqtt.MQTTMessageInfo:
+		"""
+		Coroutine version of publish. In asyncio transport mode it must be awaited on the transport loop and
+		resolves once the broker acknowledged qos 1 and 2 messages
+		"""
+		if not self._transport:
+			return self.publish(topic=topic, payload=payload, qos=qos, retain=retain)
+
+		policy = TopicPolicies.forTopic(topic)
+		qos = policy.qos if qos is None else qos
+		retain = policy.retain if retain is None else retain
+
+		if isinstance(payload, dict):
+			payload = JsonCodec.dumps(payload)
+
+		return await self._transport.publish(self._mqttClient, topic, payload, qos, retain)
+
+
+	def localPublish(self, topic: str, payload: Union[dict, str, bytes, bytearray] = None):
+		"""
+		Publishes on the local broker. In process subscribers of the loopback bus are served directly, the
+		local broker is only used if nobody in process wants the topic or if an external consumer registered for it
+		:param topic:
+		:param payload:
+		:return:
+		"""
 		if isinstance(payload, dict):
-			payload = json.dumps(payload)
+			payload = JsonCodec.dumps(payload)
+
+		if self._loopback.publish(topic=topic, payload=payload) and topic not in self._localBrokerConsumers:
+			return
+
+		if not self._mqttLocalClient.is_connected():
+			self._localSupervisor.dropped()
 
 		self._mqttLocalClient.publish(
 			topic=topic,
@@ -352,6 +731,51 @@ class MqttManager(Manager):
 		)
 
 
+	def registerLocalBrokerConsumer(self, topic: str):
+		"""
+		Declares an out of process consumer, such as snips-hotword, listening to the given topic on the local broker
+		:param topic:
+		:return:
+		"""
+		self._localBrokerConsumers.add(topic)
+
+
+	def unregisterLocalBrokerConsumer(self, topic: str):
+		self._localBrokerConsumers.discard(topic)
+
+
+	def hasLocalBrokerConsumer(self, topic: str) -> bool:
+		return topic in self._localBrokerConsumers
+
+
+	@property
+	def connectionStats(self) -> dict:
+		return {
+			'main' : self._mainSupervisor.stats,
+			'local': self._localSupervisor.stats
+		}
+
+
+	@property
+	def linkUp(self) -> bool:
+		return self._mqttClient.is_connected() and self.NetworkManager.state != State.DISCONNECTED
+
+
+	@property
+	def transport(self) -> Optional[AsyncioMqttTransport]:
+		return self._transport
+
+
+	@property
+	def loopback(self) -> LoopbackBus:
+		return self._loopback
+
+
+	@property
+	def audioFrameTopic(self) -> str:
+		return self._audioFrameTopic
+
+
 	@property
 	def mqttClient(self) -> mqtt.Client:
 		return self._mqttClient
@@ -362,6 +786,5 @@ class MqttManager(Manager):
 		return self._mqttLocalClient
 
 
-	def isForMe(self, message: mqtt.MQTTMessage) -> bool:
-		siteId = self.Commons.parseSiteId(message)
-		return siteId == self.ConfigManager.getAliceConfigByName('uuid')
+	def isForMe(self, message: Union[mqtt.MQTTMessage, DecodedMessage]) -> bool:
+		return DecodedMessage.fromMqtt(message).siteId == self.ConfigManager.getAliceConfigByName('uuid')
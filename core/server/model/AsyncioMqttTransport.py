@@ -0,0 +1,252 @@
+import asyncio
+import threading
+from typing import Callable, Dict, Optional, Union
+
+import paho.mqtt.client as mqtt
+
+from core.server.model.ReconnectSupervisor import ReconnectSupervisor
+from core.util.model.Logger import Logger
+
+
+class LoopTimer:
+	"""
+	Timer scheduled on the transport event loop, mimics the bits of threading.Timer we use
+	"""
+
+	def __init__(self, transport: 'AsyncioMqttTransport', interval: float, func: Callable, args: tuple = None, repeat: bool = False):
+		self._transport = transport
+		self._interval = interval
+		self._func = func
+		self._args = args or tuple()
+		self._repeat = repeat
+		self._handle: Optional[asyncio.TimerHandle] = None
+		self._alive = True
+
+
+	def start(self):
+		self._transport.runInLoop(self._schedule)
+
+
+	def _schedule(self):
+		if self._alive:
+			self._handle = self._transport.loop.call_later(self._interval, self._run)
+
+
+	def _run(self):
+		if not self._alive:
+			return
+
+		if not self._repeat:
+			self._alive = False
+
+		try:
+			self._func(*self._args)
+		except Exception as e:
+			Logger(prepend='[AsyncioMqttTransport]').logError(f'Error in loop timer callback: {e}')
+
+		if self._repeat:
+			self._schedule()
+
+
+	def cancel(self):
+		self._alive = False
+		if self._handle:
+			self._transport.runInLoop(self._handle.cancel)
+
+
+	def is_alive(self) -> bool: #NOSONAR
+		return self._alive
+
+
+class AsyncioMqttTransport:
+	"""
+	Runs every paho client, heartbeat and timer from one single asyncio event loop on one thread, instead of a
+	loop_start() thread per client plus a thread per timer. Paho callbacks are dispatched on that loop thread
+	"""
+
+	MISC_INTERVAL = 1
+
+
+	def __init__(self):
+		self._logger = Logger(prepend='[AsyncioMqttTransport]')
+		self._loop = asyncio.new_event_loop()
+		self._thread: Optional[threading.Thread] = None
+		self._clients: Dict[mqtt.Client, dict] = dict()
+		self._pendingPublishes: Dict[int, asyncio.Future] = dict()
+
+
+	@property
+	def loop(self) -> asyncio.AbstractEventLoop:
+		return self._loop
+
+
+	def run(self):
+		self._thread = threading.current_thread()
+		asyncio.set_event_loop(self._loop)
+		try:
+			self._loop.run_forever()
+		finally:
+			self._loop.close()
+
+
+	def stop(self):
+		for client in list(self._clients):
+			self.disconnect(client)
+
+		self.runInLoop(self._loop.stop)
+
+
+	def runInLoop(self, func: Callable, *args):
+		if threading.current_thread() is self._thread:
+			func(*args)
+		elif not self._loop.is_closed():
+			self._loop.call_soon_threadsafe(func, *args)
+
+
+	def attach(self, client: mqtt.Client, supervisor: ReconnectSupervisor = None):
+		if client in self._clients:
+			return
+
+		self._clients[client] = {'wanted': False, 'host': None, 'port': None, 'misc': None, 'connecting': None, 'supervisor': supervisor or ReconnectSupervisor(name='mqtt')}
+		client.on_socket_open = self._onSocketOpen
+		client.on_socket_close = self._onSocketClose
+		client.on_socket_register_write = self._onSocketRegisterWrite
+		client.on_socket_unregister_write = self._onSocketUnregisterWrite
+		client.on_publish = self._onPublish
+
+
+	def connect(self, client: mqtt.Client, host: str, port: int = 1883):
+		self.attach(client)
+		state = self._clients[client]
+		state['wanted'] = True
+		state['host'] = host
+		state['port'] = port
+		self.runInLoop(self._startConnect, client)
+
+
+	def disconnect(self, client: mqtt.Client):
+		state = self._clients.get(client, None)
+		if not state:
+			return
+
+		state['wanted'] = False
+		self.runInLoop(self._disconnect, client)
+
+
+	@staticmethod
+	def _disconnect(client: mqtt.Client):
+		client.disconnect()
+		client.loop_write() # Flush the disconnect packet, the loop might be stopping right after
+
+
+	def _startConnect(self, client: mqtt.Client, reconnect: bool = False):
+		state = self._clients[client]
+		if not state['wanted'] or (state['connecting'] and not state['connecting'].done()):
+			return
+
+		# Keep a reference, the loop only holds weak ones to its tasks
+		state['connecting'] = self._loop.create_task(self._connect(client, reconnect))
+
+
+	async def _connect(self, client: mqtt.Client, reconnect: bool = False):
+		state = self._clients[client]
+		try:
+			# Name resolution and the TCP handshake block, they run on the default executor so that the loop keeps
+			# serving the other clients and timers meanwhile. Paho's socket callbacks all go through runInLoop
+			if reconnect:
+				await self._loop.run_in_executor(None, client.reconnect)
+			else:
+				await self._loop.run_in_executor(None, client.connect, state['host'], state['port'])
+		except (OSError, mqtt.WebsocketConnectionError) as e:
+			self._logger.logWarning(f'Connecting to **{state["host"]}:{state["port"]}** failed: {e}')
+			state['supervisor'].failed()
+			self._scheduleReconnect(client)
+			return
+
+		if not state['wanted']:
+			# Disconnect asked for while connecting
+			self._disconnect(client)
+
+
+	def _scheduleReconnect(self, client: mqtt.Client):
+		state = self._clients[client]
+		if not state['wanted']:
+			return
+
+		self._loop.call_later(state['supervisor'].nextDelay(), self._startConnect, client, True)
+
+
+	def _misc(self, client: mqtt.Client):
+		state = self._clients[client]
+		if client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+			state['misc'] = self._loop.call_later(self.MISC_INTERVAL, self._misc, client)
+		else:
+			state['misc'] = None
+
+
+	def _onSocketOpen(self, client: mqtt.Client, _userdata, sock):
+		def onSocketOpen():
+			self._loop.add_reader(sock, client.loop_read)
+			state = self._clients[client]
+			if state['misc']:
+				state['misc'].cancel()
+			state['misc'] = self._loop.call_later(self.MISC_INTERVAL, self._misc, client)
+
+		self.runInLoop(onSocketOpen)
+
+
+	def _onSocketClose(self, client: mqtt.Client, _userdata, sock):
+		def onSocketClose():
+			self._loop.remove_reader(sock)
+			self._loop.remove_writer(sock)
+			state = self._clients[client]
+			if state['misc']:
+				state['misc'].cancel()
+				state['misc'] = None
+			self._scheduleReconnect(client)
+
+		self.runInLoop(onSocketClose)
+
+
+	def _onSocketRegisterWrite(self, client: mqtt.Client, _userdata, sock):
+		self.runInLoop(self._loop.add_writer, sock, client.loop_write)
+
+
+	def _onSocketUnregisterWrite(self, _client: mqtt.Client, _userdata, sock):
+		self.runInLoop(self._loop.remove_writer, sock)
+
+
+	def _onPublish(self, _client: mqtt.Client, _userdata, mid: int):
+		future = self._pendingPublishes.pop(mid, None)
+		if future and not future.done():
+			future.set_result(mid)
+
+
+	async def publish(self, client: mqtt.Client, topic: str, payload: Union[bytes, str] = None, qos: int = 0, retain: bool = False, timeout: float = 10) -> mqtt.MQTTMessageInfo:
+		"""
+		Coroutine publish, must be awaited on the transport loop. Returns once paho wrote the message for qos 0 or
+		once the broker acknowledged it for qos 1 and 2
+		"""
+		info = client.publish(topic, payload, qos, retain)
+		if qos == 0 or info.rc != mqtt.MQTT_ERR_SUCCESS or info.is_published():
+			return info
+
+		future = self._loop.create_future()
+		self._pendingPublishes[info.mid] = future
+		try:
+			await asyncio.wait_for(future, timeout=timeout)
+		except asyncio.TimeoutError:
+			self._pendingPublishes.pop(info.mid, None)
+		return info
+
+
+	def callLater(self, interval: float, func: Callable, args: tuple = None) -> LoopTimer:
+		timer = LoopTimer(transport=self, interval=interval, func=func, args=args)
+		timer.start()
+		return timer
+
+
+	def callEvery(self, interval: float, func: Callable, args: tuple = None) -> LoopTimer:
+		timer = LoopTimer(transport=self, interval=interval, func=func, args=args, repeat=True)
+		timer.start()
+		return timer
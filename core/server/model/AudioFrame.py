@@ -0,0 +1,76 @@
+import struct
+import time
+from typing import Optional, Tuple, Union
+
+
+class AudioFrame:
+	"""
+	Compact audio frame framing, negotiated with the main unit as an alternative to one RIFF/WAV file per frame.
+	A 16 bytes header, magic, format id, sequence number and capture timestamp in microseconds, followed by raw PCM
+	"""
+
+	WAV = 'wav'
+	COMPACT = 'compact'
+
+	MAGIC = b'AF'
+	HEADER = struct.Struct('<2sBxIQ')
+	HEADER_SIZE = HEADER.size
+
+	# Format ids, the only one the audio server captures for now
+	PCM_S16LE_16K_MONO = 1
+
+
+	@classmethod
+	def encode(cls, pcm: bytes, seq: int, timestamp: int = None, formatId: int = PCM_S16LE_16K_MONO) -> bytes:
+		"""
+		:param pcm: raw samples
+		:param seq: frame counter, wraps at 2^32
+		:param timestamp: capture time in microseconds, defaults to now
+		:param formatId:
+		:return:
+		"""
+		if timestamp is None:
+			timestamp = int(time.time() * 1000000)
+
+		return cls.HEADER.pack(cls.MAGIC, formatId, seq & 0xFFFFFFFF, timestamp) + pcm
+
+
+	@classmethod
+	def decode(cls, payload: Union[bytes, bytearray, memoryview]) -> Optional[Tuple[int, int, int, memoryview]]:
+		"""
+		:param payload:
+		:return: (formatId, seq, timestamp, pcm) or None if the payload is not a compact frame
+		"""
+		if not cls.isCompact(payload):
+			return None
+
+		_, formatId, seq, timestamp = cls.HEADER.unpack_from(payload)
+		return formatId, seq, timestamp, memoryview(payload)[cls.HEADER_SIZE:]
+
+
+	@classmethod
+	def isCompact(cls, payload: Union[bytes, bytearray, memoryview]) -> bool:
+		return len(payload) >= cls.HEADER_SIZE and bytes(payload[:2]) == cls.MAGIC
+
+
+	@classmethod
+	def pcm(cls, payload: Union[bytes, bytearray, memoryview]) -> memoryview:
+		"""
+		Returns the raw PCM of a frame, whether it came as a RIFF/WAV file or a compact frame
+		"""
+		view = memoryview(payload)
+		if bytes(view[:4]) == b'RIFF' and bytes(view[8:12]) == b'WAVE':
+			# Walk the chunks, the data chunk is usually but not always right after a 16 bytes fmt chunk
+			offset = 12
+			while offset + 8 <= len(view):
+				chunkId = bytes(view[offset:offset + 4])
+				size = struct.unpack_from('<I', view, offset + 4)[0]
+				if chunkId == b'data':
+					return view[offset + 8:offset + 8 + size]
+				offset += 8 + size + (size & 1)
+			raise ValueError('Wav frame without data chunk')
+
+		if cls.isCompact(view):
+			return view[cls.HEADER_SIZE:]
+
+		raise ValueError('Unknown audio frame format')
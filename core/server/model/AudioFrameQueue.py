@@ -0,0 +1,158 @@
+import time
+from collections import deque
+from threading import Condition
+from typing import Callable, Deque, Dict, Tuple
+
+
+class AudioFrameQueue:
+	"""
+	Bounded outbound queue for audio frames. Frames are handed to paho by a sender thread, with at most
+	`window` frames waiting in paho's own queue, so a stalled link can't grow memory nor deliver stale audio.
+	Control messages bypass this queue and are never stuck behind more than `window` frames
+	"""
+
+	DROP_OLDEST = 'dropOldest'
+	DROP_NEWEST = 'dropNewest'
+	PAUSE_CAPTURE = 'pauseCapture'
+
+	POLICIES = (DROP_OLDEST, DROP_NEWEST, PAUSE_CAPTURE)
+
+	IN_FLIGHT_TIMEOUT = 1.0
+
+
+	def __init__(self, sender: Callable, maxSize: int = 25, policy: str = DROP_OLDEST, window: int = 2):
+		"""
+		:param sender: called with topic and payload, must return paho's MQTTMessageInfo
+		:param maxSize: max frames queued per topic
+		:param policy: what to do when a topic queue is full
+		:param window: max frames handed to paho and not yet written to the socket
+		"""
+		self._sender = sender
+		self._maxSize = max(1, int(maxSize))
+		self._policy = policy if policy in self.POLICIES else self.DROP_OLDEST
+		self._window = max(1, int(window))
+
+		self._queues: Dict[str, Deque[Tuple[float, bytes]]] = dict()
+		self._inFlight: Deque = deque()
+		self._condition = Condition()
+		self._running = False
+
+		self._sent = 0
+		self._dropped = 0
+		self._latencyTotal = 0.0
+		self._latencyMax = 0.0
+
+
+	def put(self, topic: str, payload: bytes) -> bool:
+		"""
+		Queues a frame for sending
+		:param topic:
+		:param payload:
+		:return: False if a frame was dropped
+		"""
+		with self._condition:
+			queue = self._queues.get(topic, None)
+			if queue is None:
+				queue = self._queues[topic] = deque()
+
+			accepted = True
+			if len(queue) >= self._maxSize:
+				if self._policy == self.PAUSE_CAPTURE:
+					# Blocking here stalls the capture loop until the link drains
+					self._condition.wait_for(lambda: len(queue) < self._maxSize or not self._running, timeout=1)
+
+				if len(queue) >= self._maxSize:
+					self._dropped += 1
+					accepted = False
+					if self._policy == self.DROP_NEWEST:
+						return False
+					queue.popleft()
+
+			queue.append((time.monotonic(), payload))
+			self._condition.notify_all()
+			return accepted
+
+
+	def start(self):
+		"""
+		Called before the sender thread is started with run, so that a stop coming first isn't lost
+		"""
+		with self._condition:
+			self._running = True
+
+
+	def run(self):
+		while self._running:
+			with self._condition:
+				self._condition.wait_for(lambda: not self._running or any(self._queues.values()), timeout=1)
+				if not self._running:
+					break
+
+				frames = [(topic, queue.popleft()) for topic, queue in self._queues.items() if queue]
+				self._condition.notify_all()
+
+			for topic, (queuedAt, payload) in frames:
+				self._waitForWindow()
+				if not self._running:
+					return
+
+				latency = time.monotonic() - queuedAt
+				info = self._sender(topic, payload)
+
+				# The capture thread counts its drops too
+				with self._condition:
+					self._latencyTotal += latency
+					self._latencyMax = max(self._latencyMax, latency)
+					if info is not None and info.rc == 0:
+						self._sent += 1
+						self._inFlight.append((time.monotonic(), info))
+					else:
+						self._dropped += 1
+
+
+	def _waitForWindow(self):
+		while self._running:
+			now = time.monotonic()
+			# Paho forgets unsent packets on reconnect, don't wait forever on those
+			while self._inFlight and (self._inFlight[0][1].is_published() or now - self._inFlight[0][0] > self.IN_FLIGHT_TIMEOUT):
+				self._inFlight.popleft()
+
+			if len(self._inFlight) < self._window:
+				return
+
+			time.sleep(0.005)
+
+
+	def stop(self):
+		with self._condition:
+			self._running = False
+			self._queues.clear()
+			self._inFlight.clear()
+			self._condition.notify_all()
+
+
+	@property
+	def depth(self) -> int:
+		return sum(len(queue) for queue in self._queues.values())
+
+
+	@property
+	def stats(self) -> dict:
+		with self._condition:
+			return {
+				'policy'    : self._policy,
+				'depth'     : self.depth,
+				'inFlight'  : len(self._inFlight),
+				'sent'      : self._sent,
+				'dropped'   : self._dropped,
+				'latencyAvg': self._latencyTotal / self._sent if self._sent else 0.0,
+				'latencyMax': self._latencyMax
+			}
+
+
+	def resetStats(self):
+		with self._condition:
+			self._sent = 0
+			self._dropped = 0
+			self._latencyTotal = 0.0
+			self._latencyMax = 0.0
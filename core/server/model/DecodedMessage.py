@@ -0,0 +1,71 @@
+from typing import Optional, Union
+
+from paho.mqtt.client import MQTTMessage
+
+from core.commons.model.JsonCodec import JsonCodec
+
+
+class DecodedMessage:
+	"""
+	Wraps an inbound mqtt message. The json payload is decoded lazily and at most once,
+	siteId and uid are resolved from that single decode
+	"""
+
+	__slots__ = ['topic', 'payload', 'qos', 'retain', '_data', '_siteId']
+
+
+	def __init__(self, topic: str, payload: Union[bytes, bytearray] = b'', qos: int = 0, retain: bool = False):
+		self.topic = topic
+		self.payload = payload
+		self.qos = qos
+		self.retain = retain
+		self._data: Optional[dict] = None
+		self._siteId: Optional[str] = None
+
+
+	@classmethod
+	def fromMqtt(cls, message: Union[MQTTMessage, 'DecodedMessage']) -> 'DecodedMessage':
+		if isinstance(message, DecodedMessage):
+			return message
+
+		return cls(topic=message.topic, payload=message.payload, qos=message.qos, retain=message.retain)
+
+
+	@staticmethod
+	def decode(payload: Union[bytes, bytearray, str]) -> dict:
+		try:
+			data = JsonCodec.loads(payload)
+		except (ValueError, TypeError):
+			data = dict()
+
+		if data is True:
+			data = {'true': True}
+		elif data is False:
+			data = {'false': False}
+
+		return data
+
+
+	@property
+	def data(self) -> dict:
+		if self._data is None:
+			self._data = self.decode(self.payload)
+		return self._data
+
+
+	@property
+	def siteId(self) -> str:
+		if self._siteId is None:
+			data = self.data
+			if 'siteId' in data:
+				self._siteId = data['siteId'].replace('_', ' ')
+			else:
+				from core.base.SuperManager import SuperManager
+
+				self._siteId = data.get('IPAddress', SuperManager.getInstance().ConfigManager.getAliceConfigByName('uuid'))
+		return self._siteId
+
+
+	@property
+	def uid(self) -> Optional[str]:
+		return self.data.get('uid', None)
@@ -0,0 +1,59 @@
+from threading import Lock
+from typing import Callable, Dict, List, Union
+
+from core.server.model.DecodedMessage import DecodedMessage
+
+
+class LoopbackBus:
+	"""
+	In process delivery for messages published to the local broker by this very process.
+	Subscribers get the published payload object as is, no serialization, no socket and no broker round trip.
+	Topics are matched exactly, no wildcards. Callbacks use the paho signature so mqtt handlers can be reused
+	"""
+
+	def __init__(self):
+		self._subscribers: Dict[str, List[Callable]] = dict()
+		self._lock = Lock()
+
+
+	def subscribe(self, topic: str, callback: Callable):
+		with self._lock:
+			callbacks = list(self._subscribers.get(topic, list()))
+			if callback not in callbacks:
+				callbacks.append(callback)
+			self._subscribers[topic] = callbacks
+
+
+	def unsubscribe(self, topic: str, callback: Callable = None):
+		with self._lock:
+			if not callback:
+				self._subscribers.pop(topic, None)
+				return
+
+			callbacks = [cb for cb in self._subscribers.get(topic, list()) if cb != callback]
+			if callbacks:
+				self._subscribers[topic] = callbacks
+			else:
+				self._subscribers.pop(topic, None)
+
+
+	def hasSubscribers(self, topic: str) -> bool:
+		return topic in self._subscribers
+
+
+	def publish(self, topic: str, payload: Union[bytes, bytearray, str] = None) -> bool:
+		"""
+		Delivers the payload to the in process subscribers of the topic
+		:param topic:
+		:param payload:
+		:return: True if at least one subscriber got the message
+		"""
+		callbacks = self._subscribers.get(topic, None)
+		if not callbacks:
+			return False
+
+		message = DecodedMessage(topic=topic, payload=payload)
+		for callback in callbacks:
+			callback(None, None, message)
+
+		return True
@@ -0,0 +1,113 @@
+import random
+import time
+from threading import Lock
+from typing import Optional
+
+
+class ReconnectSupervisor:
+	"""
+	Jittered exponential reconnect backoff for one broker connection, and the health metrics of that connection.
+	The jitter spreads reconnections of every satellite losing the same broker at once
+	"""
+
+	def __init__(self, name: str, minDelay: float = 1, maxDelay: float = 60, factor: float = 2):
+		self._name = name
+		self._minDelay = max(0.1, float(minDelay))
+		self._maxDelay = max(self._minDelay, float(maxDelay))
+		self._factor = factor
+		self._lock = Lock()
+
+		self._failures = 0
+		self._attempts = 0
+		self._connects = 0
+		self._disconnects = 0
+		self._dropped = 0
+		self._connectedSince: Optional[float] = None
+		self._downSince: Optional[float] = None
+		self._connectedTotal = 0.0
+		self._lastTimeToReconnect = 0.0
+		self._maxTimeToReconnect = 0.0
+
+
+	@property
+	def name(self) -> str:
+		return self._name
+
+
+	def nextDelay(self) -> float:
+		"""
+		Full jitter backoff, a random delay between the min delay and an exponentially growing cap
+		:return: seconds to wait before the next connection attempt
+		"""
+		with self._lock:
+			cap = min(self._maxDelay, self._minDelay * self._factor ** self._failures)
+			self._failures += 1
+			return random.uniform(self._minDelay, cap)
+
+
+	def connected(self) -> Optional[float]:
+		"""
+		Records a successful connection
+		:return: how long the connection was down, None for the first connection
+		"""
+		with self._lock:
+			now = time.monotonic()
+			self._attempts += 1
+			self._connects += 1
+			self._failures = 0
+			self._connectedSince = now
+
+			if self._downSince is None:
+				return None
+
+			downtime = now - self._downSince
+			self._downSince = None
+			self._lastTimeToReconnect = downtime
+			self._maxTimeToReconnect = max(self._maxTimeToReconnect, downtime)
+			return downtime
+
+
+	def disconnected(self):
+		with self._lock:
+			now = time.monotonic()
+			self._disconnects += 1
+			if self._connectedSince is not None:
+				self._connectedTotal += now - self._connectedSince
+				self._connectedSince = None
+
+			if self._downSince is None:
+				self._downSince = now
+
+
+	def failed(self):
+		with self._lock:
+			self._attempts += 1
+			if self._downSince is None:
+				self._downSince = time.monotonic()
+
+
+	def dropped(self):
+		self._dropped += 1
+
+
+	@property
+	def isConnected(self) -> bool:
+		return self._connectedSince is not None
+
+
+	@property
+	def stats(self) -> dict:
+		now = time.monotonic()
+		connectedFor = now - self._connectedSince if self._connectedSince is not None else 0.0
+		return {
+			'connected'          : self.isConnected,
+			'attempts'           : self._attempts,
+			'connects'           : self._connects,
+			'disconnects'        : self._disconnects,
+			'connectedFor'       : connectedFor,
+			'connectedTotal'     : self._connectedTotal + connectedFor,
+			'downFor'            : now - self._downSince if self._downSince is not None else 0.0,
+			'lastTimeToReconnect': self._lastTimeToReconnect,
+			'maxTimeToReconnect' : self._maxTimeToReconnect,
+			'droppedWhileDown'   : self._dropped
+		}
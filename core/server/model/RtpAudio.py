@@ -0,0 +1,238 @@
+import random
+import socket
+import struct
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class RtpPacket:
+	"""
+	Minimal RTP (RFC 3550) framing for the audio stream: 12 bytes fixed header, no csrc, no extension.
+	The timestamp runs on the 16kHz sample clock
+	"""
+
+	HEADER = struct.Struct('!BBHII')
+	HEADER_SIZE = HEADER.size
+	VERSION = 2
+	PAYLOAD_TYPE = 96 # Dynamic payload type, signed 16 bits little endian mono PCM as negotiated at greeting
+
+
+	@classmethod
+	def pack(cls, seq: int, timestamp: int, ssrc: int, payload: bytes, marker: bool = False) -> bytes:
+		return cls.HEADER.pack(cls.VERSION << 6, (0x80 if marker else 0) | cls.PAYLOAD_TYPE, seq & 0xFFFF, timestamp & 0xFFFFFFFF, ssrc) + payload
+
+
+	@classmethod
+	def unpack(cls, data: bytes) -> Optional[Tuple[int, int, int, bytes]]:
+		"""
+		:param data:
+		:return: (seq, timestamp, ssrc, payload) or None if this isn't one of our RTP packets
+		"""
+		if len(data) < cls.HEADER_SIZE:
+			return None
+
+		first, second, seq, timestamp, ssrc = cls.HEADER.unpack_from(data)
+		if first >> 6 != cls.VERSION or second & 0x7F != cls.PAYLOAD_TYPE:
+			return None
+
+		return seq, timestamp, ssrc, data[cls.HEADER_SIZE + (first & 0x0F) * 4:]
+
+
+class RtpSender:
+	"""
+	Sends audio frames as RTP over UDP. Sending never blocks the capture thread, a frame that can't be sent is lost
+	"""
+
+	def __init__(self, host: str, port: int, ssrc: int = None):
+		# Resolved once, sendto would resolve a host name again for every frame
+		self._address = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_DGRAM)[0][4]
+		self._ssrc = ssrc if ssrc is not None else random.getrandbits(32)
+		self._seq = random.getrandbits(16)
+		self._timestamp = random.getrandbits(32)
+		self._first = True
+		self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+		self._socket.setblocking(False)
+		self._stats = {'sent': 0, 'errors': 0}
+
+
+	def send(self, pcm: bytes, samples: int) -> bool:
+		packet = RtpPacket.pack(seq=self._seq, timestamp=self._timestamp, ssrc=self._ssrc, payload=pcm, marker=self._first)
+		self._seq = (self._seq + 1) & 0xFFFF
+		self._timestamp = (self._timestamp + samples) & 0xFFFFFFFF
+		self._first = False
+
+		try:
+			self._socket.sendto(packet, self._address)
+			self._stats['sent'] += 1
+			return True
+		except OSError:
+			self._stats['errors'] += 1
+			return False
+
+
+	def close(self):
+		self._socket.close()
+
+
+	@property
+	def ssrc(self) -> int:
+		return self._ssrc
+
+
+	@property
+	def stats(self) -> Dict[str, int]:
+		return dict(self._stats)
+
+
+class JitterBuffer:
+	"""
+	Reorders RTP payloads by sequence number. Packets are held until the next expected one arrives or until more
+	than `depth` packets are waiting, at which point the missing ones are counted lost and skipped. Late and
+	duplicate packets are dropped. Sequence numbers are compared modulo 2^16
+	"""
+
+	def __init__(self, depth: int = 4):
+		self._depth = depth
+		self._expected: Optional[int] = None
+		self._highest: Optional[int] = None
+		self._pending: Dict[int, bytes] = dict()
+		self._stats = {'received': 0, 'released': 0, 'lost': 0, 'late': 0, 'duplicates': 0, 'reordered': 0}
+
+
+	@staticmethod
+	def _distance(seq: int, expected: int) -> int:
+		"""
+		Signed distance from expected to seq, wrapping at 2^16
+		"""
+		return ((seq - expected + 0x8000) & 0xFFFF) - 0x8000
+
+
+	def push(self, seq: int, payload: bytes) -> List[bytes]:
+		"""
+		:param seq:
+		:param payload:
+		:return: the payloads that are now in order, possibly none
+		"""
+		self._stats['received'] += 1
+		if self._expected is None:
+			self._expected = seq
+			self._highest = seq
+
+		distance = self._distance(seq, self._expected)
+		if distance < 0:
+			self._stats['late'] += 1
+			return list()
+
+		if seq in self._pending:
+			self._stats['duplicates'] += 1
+			return list()
+
+		if self._distance(seq, self._highest) < 0:
+			# Fills a gap left by a packet that overtook it
+			self._stats['reordered'] += 1
+		else:
+			self._highest = seq
+
+		self._pending[seq] = payload
+		return self._release()
+
+
+	def _release(self) -> List[bytes]:
+		released = list()
+		while self._pending:
+			payload = self._pending.pop(self._expected, None)
+			if payload is None:
+				if len(self._pending) <= self._depth:
+					break
+
+				# Give up on the missing packet
+				self._stats['lost'] += 1
+			else:
+				released.append(payload)
+
+			self._expected = (self._expected + 1) & 0xFFFF
+
+		self._stats['released'] += len(released)
+		return released
+
+
+	def flush(self) -> List[bytes]:
+		"""
+		Releases everything still pending, in order, counting the gaps as lost
+		"""
+		released = list()
+		while self._pending:
+			payload = self._pending.pop(self._expected, None)
+			if payload is None:
+				self._stats['lost'] += 1
+			else:
+				released.append(payload)
+			self._expected = (self._expected + 1) & 0xFFFF
+
+		self._stats['released'] += len(released)
+		return released
+
+
+	def reset(self):
+		self._expected = None
+		self._highest = None
+		self._pending = dict()
+
+
+	@property
+	def stats(self) -> Dict[str, int]:
+		return dict(self._stats)
+
+
+class RtpReceiver:
+	"""
+	Receives an RTP audio stream and hands the in order PCM payloads to a callback. This is the main unit's side
+	of the transport, the satellite only needs it to test itself in loopback
+	"""
+
+	def __init__(self, callback: Callable[[bytes], None], host: str = '0.0.0.0', port: int = 0, depth: int = 4):
+		self._callback = callback
+		self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+		self._socket.bind((host, port))
+		self._socket.settimeout(0.5)
+		self._buffers: Dict[int, JitterBuffer] = dict()
+		self._depth = depth
+		self._running = False
+
+
+	def run(self):
+		self._running = True
+		while self._running:
+			try:
+				data = self._socket.recv(65535)
+			except socket.timeout:
+				continue
+			except OSError:
+				break
+
+			packet = RtpPacket.unpack(data)
+			if not packet:
+				continue
+
+			seq, _, ssrc, payload = packet
+			# A new ssrc means the sender restarted, it gets its own sequence space
+			buffer = self._buffers.get(ssrc, None)
+			if not buffer:
+				buffer = self._buffers[ssrc] = JitterBuffer(depth=self._depth)
+
+			for pcm in buffer.push(seq, payload):
+				self._callback(pcm)
+
+
+	def stop(self):
+		self._running = False
+		self._socket.close()
+
+
+	@property
+	def port(self) -> int:
+		return self._socket.getsockname()[1]
+
+
+	@property
+	def stats(self) -> Dict[int, Dict[str, int]]:
+		return {ssrc: buffer.stats for ssrc, buffer in self._buffers.items()}
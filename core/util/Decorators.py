@@ -120,3 +120,21 @@ def IfSetting(func: Callable = None, settingName: str = None, settingValue: Any
 
 
 	return argumentWrapper(func) if func else argumentWrapper
+
+
+def Lane(name: str):
+	"""
+	Marks an event handler that blocks, so that broadcasting runs it on its own event lane instead of the
+	broadcaster's thread, usually paho's network loop. Handlers sharing a lane run one at a time, in order
+	Examples:
+		@Lane('playback')
+		def onPlayBytes(self, event: PlayBytesEvent):
+			...
+	:param name: lane name
+	:return:
+	"""
+	def laneDecorator(func: Callable):
+		func.lane = name
+		return func
+
+	return laneDecorator
@@ -1,15 +1,19 @@
 import socket
 import time
 from threading import Thread
-from typing import Optional
+from typing import Callable, Optional
 
 from core.base.model.Manager import Manager
 from core.base.model.States import State
 from core.commons import constants
+from core.server.model.AudioFrame import AudioFrame
 
 
 class NetworkManager(Manager):
 
+	MQTT = 'mqtt'
+	RTP = 'rtp'
+
 	def __init__(self):
 		super().__init__()
 		self._tries = 0
@@ -18,6 +22,10 @@ class NetworkManager(Manager):
 		self._heartbeats = self.ThreadManager.newEvent('heartbeats')
 		self._coreLastHeartbeat = 0
 		self._heartbeatsThread: Optional[Thread] = None
+		self._heartbeatsTimer = None
+		self._audioFormat = AudioFrame.WAV
+		self._audioTransport = self.MQTT
+		self._rtpPort: Optional[int] = None
 
 
 	def onStart(self):
@@ -120,7 +128,7 @@ class NetworkManager(Manager):
 			self.logWarning('Alice did not answer to greetings for 5 times, scheduling retry in 5 minutes')
 			self._tries = 0
 			self._state = State.DORMANT
-			self._greetingTimer = self.ThreadManager.newTimer(
+			self._greetingTimer = self.newTimer(
 				interval=300,
 				func=self.tryConnectingToAlice
 			)
@@ -134,20 +142,44 @@ class NetworkManager(Manager):
 		self.MqttManager.publish(
 			topic=constants.TOPIC_ALICE_GREETING,
 			payload={
-				'uid': self.ConfigManager.getAliceConfigByName('uuid')
+				'uid'            : self.ConfigManager.getAliceConfigByName('uuid'),
+				'audioFormats'   : [AudioFrame.COMPACT, AudioFrame.WAV],
+				'audioTransports': [self.RTP, self.MQTT] if self.ConfigManager.getAliceConfigByName('audioOverRtp') else [self.MQTT]
 			}
 		)
 
-		self._greetingTimer = self.ThreadManager.newTimer(
+		self._greetingTimer = self.newTimer(
 			interval=5,
 			func=self.tryConnectingToAlice
 		)
 
 
-	def onAliceConnectionAccepted(self):
+	def newTimer(self, interval: float, func: Callable, repeat: bool = False):
+		"""
+		Schedules on the mqtt event loop when running the asyncio transport, on a timer thread otherwise
+		"""
+		transport = self.MqttManager.transport
+		if transport:
+			return transport.callEvery(interval=interval, func=func) if repeat else transport.callLater(interval=interval, func=func)
+
+		return self.ThreadManager.newTimer(interval=interval, func=func)
+
+
+	def onAliceConnectionAccepted(self, payload: dict = None):
 		if self._state != State.WAITING_REPLY:
 			return
 
+		# A main unit that doesn't know about compact frames doesn't answer with a format, stay on Hermes' wav frames
+		audioFormat = (payload or dict()).get('audioFormat', AudioFrame.WAV)
+		self._audioFormat = audioFormat if audioFormat in (AudioFrame.COMPACT, AudioFrame.WAV) else AudioFrame.WAV
+
+		# Rtp carries raw PCM, the main unit must tell us where to send it
+		self._rtpPort = (payload or dict()).get('rtpPort', None)
+		if (payload or dict()).get('audioTransport', self.MQTT) == self.RTP and self._rtpPort and self.ConfigManager.getAliceConfigByName('audioOverRtp'):
+			self._audioTransport = self.RTP
+		else:
+			self._audioTransport = self.MQTT
+
 		if self._greetingTimer and self._greetingTimer.is_alive():
 			self._greetingTimer.cancel()
 
@@ -156,7 +188,11 @@ class NetworkManager(Manager):
 
 		self._state = State.REGISTERED
 		self._tries = 0
-		self.logInfo('Alice answered and accepted the connection')
+		if self._audioTransport == self.RTP:
+			self.logInfo(f'Alice answered and accepted the connection, streaming audio over rtp to port {self._rtpPort}')
+		else:
+			self.logInfo(f'Alice answered and accepted the connection, streaming **{self._audioFormat}** audio frames')
+		self.MqttManager.flushOutbox()
 
 
 	def onAliceConnectionRefused(self):
@@ -173,6 +209,7 @@ class NetworkManager(Manager):
 			self._state = State.DISCONNECTED
 			self.logInfo('Alice main unit disconnected')
 			self.cancelHeartbeatsTimers()
+			self.broadcast(method=constants.EVENT_CORE_DISCONNECTED, exceptions=[self.name], propagateToSkills=True)
 
 
 	def onCoreReconnection(self):
@@ -181,14 +218,25 @@ class NetworkManager(Manager):
 			self._coreLastHeartbeat = time.time()
 			self.logInfo('Alice main unit came online')
 			self.tryConnectingToAlice()
+			self.MqttManager.flushOutbox()
 
 
 	def cancelHeartbeatsTimers(self, restart: bool = False):
 		self._heartbeats.clear()
+		if self._heartbeatsTimer:
+			self._heartbeatsTimer.cancel()
+			self._heartbeatsTimer = None
+
 		if self._heartbeatsThread and self._heartbeatsThread.is_alive():
 			self.ThreadManager.terminateThread('heartbeats')
 
-		if restart:
+		if not restart:
+			return
+
+		if self.MqttManager.transport:
+			self._heartbeats.set()
+			self._heartbeatsTimer = self.newTimer(interval=2.5, func=self.heartbeatTick, repeat=True)
+		else:
 			self._heartbeatsThread = self.ThreadManager.newThread(
 				name='heartbeats',
 				target=self.heartbeatsThread
@@ -198,11 +246,15 @@ class NetworkManager(Manager):
 	def heartbeatsThread(self):
 		self._heartbeats.set()
 		while self._heartbeats.is_set():
-			self.sendHeartbeat()
-			self.checkCoreHeartbeat()
+			self.heartbeatTick()
 			time.sleep(2.5)
 
 
+	def heartbeatTick(self):
+		self.sendHeartbeat()
+		self.checkCoreHeartbeat()
+
+
 	def sendHeartbeat(self):
 		self.MqttManager.publish(
 			topic=constants.TOPIC_DEVICE_HEARTBEAT,
@@ -226,3 +278,18 @@ class NetworkManager(Manager):
 	@property
 	def state(self) -> State:
 		return self._state
+
+
+	@property
+	def audioFormat(self) -> str:
+		return self._audioFormat
+
+
+	@property
+	def audioTransport(self) -> str:
+		return self._audioTransport
+
+
+	@property
+	def rtpPort(self) -> Optional[int]:
+		return self._rtpPort
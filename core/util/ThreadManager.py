@@ -22,6 +22,7 @@ from typing import Callable, Union
 
 from core.base.model.Manager import Manager
 from core.util.model.AliceEvent import AliceEvent
+from core.util.model.EventLane import EventLane
 from core.util.model.ThreadTimer import ThreadTimer
 
 
@@ -33,10 +34,17 @@ class ThreadManager(Manager):
 		self._timers = list()
 		self._threads = dict()
 		self._events = dict()
+		self._lanes = dict()
+		self._lanesLock = threading.Lock()
 
 
 	def onStop(self):
 		super().onStop()
+		with self._lanesLock:
+			for lane in self._lanes.values():
+				lane.stop()
+			self._lanes = dict()
+
 		for timer in self._timers:
 			if timer.timer.isAlive():
 				timer.timer.cancel()
@@ -155,11 +163,34 @@ class ThreadManager(Manager):
 		return self._threads[name].isAlive()
 
 
-	def newEvent(self, name: str, onSetCallback: Union[str, Callable] = None, onClearCallback: Union[str, Callable] = None) -> AliceEvent:
+	def dispatch(self, lane: str, handler: Callable, kwargs: dict = None):
+		"""
+		Queues a handler call on an event lane, the lane's worker thread is started on first use
+		"""
+		eventLane = self._lanes.get(lane, None)
+		if not eventLane:
+			# Broadcasts come from many threads, two of them must not both create and start the same lane
+			with self._lanesLock:
+				eventLane = self._lanes.get(lane, None)
+				if not eventLane:
+					eventLane = self._lanes[lane] = EventLane(lane)
+					self.newThread(name=f'eventLane_{lane}', target=eventLane.run)
+
+		eventLane.put(handler, kwargs or dict())
+
+
+	def newEvent(self, name: str, onSetCallback: Union[str, Callable] = None, onClearCallback: Union[str, Callable] = None, coalesce: float = 0) -> AliceEvent:
+		"""
+		:param name:
+		:param onSetCallback:
+		:param onClearCallback:
+		:param coalesce: seconds during which transitions are gathered into a single broadcast, 0 to broadcast each one
+		:return:
+		"""
 		if name in self._events:
 			self._events[name].clear()
 
-		self._events[name] = AliceEvent(name, onSetCallback, onClearCallback)
+		self._events[name] = AliceEvent(name, onSetCallback, onClearCallback, coalesce)
 		return self._events[name]
 
 
@@ -1,35 +1,43 @@
-from threading import Event
+from threading import Event, Lock
 
 from core.base.model.ProjectAliceObject import ProjectAliceObject
 from core.commons import constants
 
 
 class AliceEvent(Event, ProjectAliceObject):
+	"""
+	An Event that broadcasts its transitions. Setting an already set event or clearing a cleared one doesn't
+	broadcast anything. With a coalescing window, transitions are announced once the window is over and only if the
+	state then differs from the last announced one, so a rapid set/clear/set storm costs a single broadcast
+	"""
 
-	def __init__(self, name: str, onSet: str = None, onClear: str = None):
+	def __init__(self, name: str, onSet: str = None, onClear: str = None, coalesce: float = 0):
 		super().__init__()
 		self._name = name
 		self._onSet = onSet
 		self._onClear = onClear
 		self._kwargs = dict()
+		self._coalesce = coalesce
+		self._stateLock = Lock()
+		self._announced = False
+		self._coalescing = False
 
 
 	def set(self, **kwargs) -> None:
-		super().set()
+		with self._stateLock:
+			changed = not self.is_set()
+			super().set()
 
-		if kwargs:
-			self._kwargs = kwargs
-		else:
-			kwargs = dict()
+			if kwargs:
+				self._kwargs = kwargs
 
-		if not self._onSet:
-			self.doBroadcast(state='set', **kwargs)
+		if not changed:
+			return
+
+		if self._coalesce > 0:
+			self._coalesceTransition()
 		else:
-			self.broadcast(
-				method=self._onSet,
-				exceptions=[constants.DUMMY],
-				**kwargs
-			)
+			self._announceSet(**kwargs)
 
 
 	def clear(self, **kwargs) -> None:
@@ -38,19 +46,20 @@ class AliceEvent(Event, ProjectAliceObject):
 		:param kwargs:
 		:return:
 		"""
-		super().clear()
+		with self._stateLock:
+			changed = self.is_set()
+			super().clear()
 
-		if kwargs:
-			self._kwargs = {**kwargs, **self._kwargs}
+			if kwargs:
+				self._kwargs = {**kwargs, **self._kwargs}
 
-		if not self._onClear:
-			self.doBroadcast(state='clear', **self._kwargs)
+		if not changed:
+			return
+
+		if self._coalesce > 0:
+			self._coalesceTransition()
 		else:
-			self.broadcast(
-				method=self._onClear,
-				exceptions=[constants.DUMMY],
-				**self._kwargs
-			)
+			self._announceClear()
 
 
 	def cancel(self) -> None:
@@ -58,7 +67,56 @@ class AliceEvent(Event, ProjectAliceObject):
 		Clears an event but doesn't call the onClear event
 		:return:
 		"""
-		super().clear()
+		with self._stateLock:
+			super().clear()
+			self._announced = False
+
+
+	def _coalesceTransition(self):
+		with self._stateLock:
+			if self._coalescing:
+				return # The pending announcement will pick up the final state
+
+			self._coalescing = True
+
+		self.ThreadManager.doLater(interval=self._coalesce, func=self._endCoalescing)
+
+
+	def _endCoalescing(self):
+		with self._stateLock:
+			self._coalescing = False
+			state = self.is_set()
+			if state == self._announced:
+				return # Flipped back and forth within the window, nothing to tell
+
+		if state:
+			self._announceSet(**self._kwargs)
+		else:
+			self._announceClear()
+
+
+	def _announceSet(self, **kwargs):
+		self._announced = True
+		if not self._onSet:
+			self.doBroadcast(state='set', **kwargs)
+		else:
+			self.broadcast(
+				method=self._onSet,
+				exceptions=[constants.DUMMY],
+				**kwargs
+			)
+
+
+	def _announceClear(self):
+		self._announced = False
+		if not self._onClear:
+			self.doBroadcast(state='clear', **self._kwargs)
+		else:
+			self.broadcast(
+				method=self._onClear,
+				exceptions=[constants.DUMMY],
+				**self._kwargs
+			)
 
 
 	def doBroadcast(self, state: str, **kwargs):
@@ -0,0 +1,50 @@
+import queue
+from typing import Callable
+
+from core.util.model.Logger import Logger
+
+
+class EventLane:
+	"""
+	A named FIFO of event handler calls, run one after the other by a single worker thread. Handlers on the same
+	lane keep the order their events were broadcast in, and a handler that blocks only delays its own lane
+	"""
+
+	def __init__(self, name: str):
+		self._name = name
+		self._queue = queue.Queue()
+		self._running = False
+		self._logger = Logger(prepend=f'[EventLane {name}]')
+
+
+	def put(self, handler: Callable, kwargs: dict):
+		self._queue.put((handler, kwargs))
+
+
+	def run(self):
+		self._running = True
+		while self._running:
+			job = self._queue.get()
+			if job is None:
+				break
+
+			handler, kwargs = job
+			try:
+				handler(**kwargs)
+			except Exception as e:
+				self._logger.logError(f'Handler {getattr(handler, "__qualname__", handler)} failed: {e}')
+
+
+	def stop(self):
+		self._running = False
+		self._queue.put(None)
+
+
+	@property
+	def name(self) -> str:
+		return self._name
+
+
+	@property
+	def depth(self) -> int:
+		return self._queue.qsize()
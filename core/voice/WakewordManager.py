@@ -1,46 +1,74 @@
+import time
 from importlib import import_module, reload
-
-from paho.mqtt.client import MQTTMessage
+from typing import Optional
 
 from core.base.model.Manager import Manager
 from core.voice.model.WakewordEngine import WakewordEngine
+from core.voice.model.WakewordProcess import WakewordProcess
 
 
 class WakewordManager(Manager):
 
+	SWAP_TIMEOUT = 30
+	WARMUP_TIMEOUT = 2
+
 	def __init__(self):
 		super().__init__()
 		self._engine = None
+		self._process: Optional[WakewordProcess] = None
+		# A process being swapped in, fed alongside the running one until it takes over
+		self._incoming: Optional[WakewordProcess] = None
+		self._processCount = 0
 
 
 	def onStart(self):
 		super().onStart()
 		self._startWakewordEngine()
+		self.AudioServer.addFrameConsumer(self.onPcmFrame)
 
 
 	def onStop(self):
 		super().onStop()
-		if self._engine:
-			self._engine.onStop()
+		self.AudioServer.removeFrameConsumer(self.onPcmFrame)
+		self._stopEngine()
 
 
 	def onBooted(self):
-		if self._engine:
+		if self._process:
+			self._process.listen()
+		elif self._engine:
 			self._engine.onBooted()
 
 
-	def onAudioFrame(self, message: MQTTMessage, siteId: str):
-		if self._engine and self._engine.enabled:
-			self._engine.onAudioFrame(message=message, siteId=siteId)
+	def onPcmFrame(self, pcm: bytes):
+		# Incoming first, it is cleared only once it is the running process
+		incoming = self._incoming
+		process = self._process
+		if process:
+			process.write(pcm)
+			if incoming and incoming is not process:
+				if not incoming.warmedUp:
+					incoming.warmUp(previous=process)
+				else:
+					incoming.write(pcm)
+			return
+
+		engine = self._engine
+		if engine and engine.enabled:
+			engine.onPcmFrame(pcm)
 
 
 	def onHotwordToggleOn(self):
-		if self._engine:
+		if self._process:
+			self._process.listen()
+		elif self._engine:
 			self._engine.onHotwordToggleOn()
 
 
 	def onHotwordToggleOff(self):
-		if self._engine:
+		if self._process:
+			self._process.pause()
+		elif self._engine:
 			self._engine.onHotwordToggleOff()
 
 
@@ -66,9 +94,40 @@ class WakewordManager(Manager):
 			self.logFatal("Couldn't install wakeword engine, going down")
 			return
 
+		self._startEngine()
+
+
+	def _startEngine(self):
+		"""
+		Starts the engine in process, or its detector in a child process if so configured and the engine supports it
+		"""
+		if self.ConfigManager.getAliceConfigByName('wakewordProcess'):
+			factory = self._engine.detectorFactory()
+			if factory:
+				self._engine.enabled = True
+				self._process = self._newProcess(factory)
+				self._process.start()
+				return
+
+			self.logInfo(f'**{self._engine.NAME}** cannot run in a separate process, running it in process')
+
 		self._engine.onStart()
 
 
+	def _newProcess(self, factory) -> WakewordProcess:
+		# Unique names, a swapped in process lives next to the previous one for a while
+		self._processCount += 1
+		return WakewordProcess(name=f'WakewordProcess{self._processCount}', factory=factory, onDetected=self._engine.onDetected)
+
+
+	def _stopEngine(self):
+		if self._process:
+			self._process.stop()
+			self._process = None
+		elif self._engine:
+			self._engine.onStop()
+
+
 	@property
 	def wakewordEngine(self) -> WakewordEngine:
 		return self._engine
@@ -84,20 +143,67 @@ class WakewordManager(Manager):
 
 	def disableEngine(self):
 		if self._engine:
-			self._engine.onStop()
+			self._stopEngine()
 			self._engine.enabled = False
 
 
 	def enableEngine(self):
 		if self._engine:
-			self._engine.onStart()
+			self._startEngine()
 		else:
 			self._startWakewordEngine()
 			if self._engine:
 				self._engine.onBooted()
 
 
+	def hotSwapEngine(self):
+		"""
+		Loads the current wakeword models next to the running ones and swaps them in without pausing detection. Only
+		engines that can't do that are restarted
+		"""
+		if self._process:
+			self._hotSwapProcess()
+		elif not self._engine or not self._engine.enabled or not self._engine.hotSwap():
+			self.restartEngine()
+
+
+	def _hotSwapProcess(self):
+		"""
+		Starts a process with the current models next to the running one, warms it up on the last second of audio
+		and the audio that follows, then swaps it in between two captured chunks
+		"""
+		start = time.perf_counter()
+		previous = self._process
+		process = self._newProcess(self._engine.detectorFactory())
+		process.start()
+
+		if not process.waitReady(timeout=self.SWAP_TIMEOUT):
+			self.logError('The new wakeword process did not start in time, keeping the running one')
+			process.stop()
+			return
+
+		loaded = time.perf_counter()
+		# The capture thread replays the recent audio to it then keeps feeding it, so that nothing falls in between
+		self._incoming = process
+		deadline = time.monotonic() + self.WARMUP_TIMEOUT
+		while not process.warmedUp and time.monotonic() < deadline:
+			time.sleep(0.01)
+		process.drain(timeout=self.WARMUP_TIMEOUT)
+		warm = time.perf_counter()
+
+		# The new process already has all the audio the previous one was handed, it can go right away
+		listening = previous.listening
+		previous.pause()
+		process.takeOver(listening=listening)
+		self._process = process
+		self._incoming = None
+		swapped = time.perf_counter()
+		previous.stop()
+
+		missed = process.droppedSamples // max(process.frameLength, 1)
+		self.logInfo(f'Wakeword process started in {(loaded - start) * 1000:.1f} ms, warmed up in {(warm - loaded) * 1000:.1f} ms and swapped in {(swapped - warm) * 1000:.2f} ms, {missed} frames missed')
+
+
 	def restartEngine(self):
-		if self._engine:
-			self._engine.onStop()
+		self._stopEngine()
 		self.enableEngine()
@@ -0,0 +1,142 @@
+import time
+from threading import Lock
+from typing import Optional, Union
+
+from core.voice.model.PcmRingBuffer import PcmRingBuffer
+from core.voice.model.WakewordDetector import WakewordDetector
+from core.voice.model.WakewordEngine import WakewordEngine
+
+
+class DetectorWakewordEngine(WakewordEngine):
+	"""
+	Base of the engines running their WakewordDetector in process, on a thread fed by a frame aligned ring buffer.
+	Subclasses provide detectorFactory and onDetected
+	"""
+
+	RING_SECONDS = 2
+	# Audio replayed to a hot swapped detector before it takes over, so that it doesn't start cold
+	WARMUP_SECONDS = 1
+
+	def __init__(self):
+		super().__init__()
+		self._working = self.ThreadManager.newEvent('ListenForWakeword')
+		self._detector: Optional[WakewordDetector] = None
+		self._ring: Optional[PcmRingBuffer] = None
+		self._hotwordThread = None
+		self._swapLock = Lock()
+
+
+	def onStart(self):
+		super().onStart()
+		try:
+			if self._detector:
+				self._detector.close()
+				self._detector = None
+
+			factory = self.detectorFactory()
+			if not factory:
+				self.logError(f"Couldn't start {self.NAME}: no wakeword detector provided")
+				self._enabled = False
+				return
+
+			self._detector = factory()
+			self._ring = PcmRingBuffer(frameLength=self._detector.frameLength, capacity=self._detector.sampleRate * self.RING_SECONDS)
+		except Exception as e:
+			self.logError(f"Couldn't start {self.NAME}: {e}")
+			self._detector = None
+			self._enabled = False
+
+
+	def onBooted(self):
+		super().onBooted()
+		if self._enabled:
+			self.onHotwordToggleOn()
+
+
+	def onStop(self):
+		if self._enabled:
+			self._working.clear()
+			self._ring.reset()
+		super().onStop()
+
+
+	def onHotwordToggleOff(self):
+		if self._enabled:
+			self._working.clear()
+			self._ring.reset()
+			self._hotwordThread.join(timeout=2)
+
+
+	def onHotwordToggleOn(self):
+		if self._enabled:
+			self._ring.reset()
+			self._working.set()
+			self._hotwordThread = self.ThreadManager.newThread(name='HotwordThread', target=self.worker)
+
+
+	def onPcmFrame(self, pcm: Union[bytes, memoryview]):
+		if not self.enabled or not self._working.is_set():
+			return
+
+		self._ring.write(pcm)
+
+
+	def worker(self):
+		overflows = self._ring.overflows
+		while self._working.is_set():
+			detector = self._detector
+			# Short waits, so that toggling off doesn't wait for audio that may never come
+			if not self._ring.readInto(detector.frame, timeout=0.5):
+				continue
+
+			if self._ring.overflows != overflows:
+				overflows = self._ring.overflows
+				self.logWarning(f'Wakeword detection falling behind, {self._ring.droppedSamples} samples dropped so far')
+
+			with self._swapLock:
+				if detector is not self._detector:
+					# Swapped while waiting for audio, the window goes to the new detector
+					self._detector.frame[:] = detector.frame
+					detector = self._detector
+				result = detector.processFrame()
+
+			if result > -1:
+				self.onDetected(result, detector.keyword(result))
+				return
+
+
+	def hotSwap(self) -> bool:
+		"""
+		Builds a detector with the current models while the running one keeps listening, warms it up on the last
+		second of audio, then swaps it in between two frames
+		"""
+		if not self._enabled or not self._detector:
+			return False
+
+		start = time.perf_counter()
+		droppedBefore = self._ring.droppedSamples
+		try:
+			detector = self.detectorFactory()()
+		except Exception as e:
+			self.logError(f'Failed loading the new wakeword models, keeping the running ones: {e}')
+			return True
+
+		if detector.frameLength != self._ring.frameLength:
+			detector.close()
+			return False
+
+		warmup = memoryview(self._ring.recent(detector.sampleRate * self.WARMUP_SECONDS))
+		frameBytes = detector.frameLength * 2
+		for offset in range(len(warmup) % frameBytes, len(warmup), frameBytes):
+			detector.process(warmup[offset:offset + frameBytes])
+
+		loaded = time.perf_counter()
+		with self._swapLock:
+			previous = self._detector
+			self._detector = detector
+		swapped = time.perf_counter()
+		previous.close()
+
+		missed = (self._ring.droppedSamples - droppedBefore) // detector.frameLength
+		self.logInfo(f'Wakeword models loaded in {(loaded - start) * 1000:.1f} ms and swapped in {(swapped - loaded) * 1000:.2f} ms, {missed} frames missed')
+		return True
@@ -0,0 +1,267 @@
+import functools
+import wave
+from pathlib import Path
+from typing import Callable, List, Union
+
+from core.commons import constants
+from core.voice.model.DetectorWakewordEngine import DetectorWakewordEngine
+from core.voice.model.WakewordDetector import WakewordDetector
+
+try:
+	import numpy as np
+except ModuleNotFoundError:
+	pass # Will auto install
+
+
+class Mfcc:
+	"""
+	Vectorized MFCC of 16 bits PCM: 25 ms hamming windows every 10 ms, 26 mel bands, cepstral coefficients 1 to 12.
+	The energy coefficient is left out so that loudness doesn't matter, and vectors are unit length so that comparing
+	two of them is a dot product
+	"""
+
+	WINDOW = 400
+	HOP = 160
+	FFT = 512
+	BANDS = 26
+	COEFFICIENTS = 12
+	PRE_EMPHASIS = 0.97
+
+	def __init__(self, sampleRate: int = 16000):
+		self._window = np.hamming(self.WINDOW).astype(np.float32)
+		self._filters = self.melFilterbank(sampleRate)
+		self._dct = self.dctMatrix()[1:self.COEFFICIENTS + 1]
+		self._pending = np.zeros(0, dtype=np.float32)
+
+
+	def stream(self, samples: np.ndarray) -> np.ndarray:
+		"""
+		Adds samples to the stream
+		:return: the features of the windows completed, shape (windows, COEFFICIENTS)
+		"""
+		self._pending = np.concatenate((self._pending, samples))
+		frames = self.frames(self._pending)
+		self._pending = self._pending[len(frames) * self.HOP:]
+		return self.features(frames)
+
+
+	def reset(self):
+		self._pending = np.zeros(0, dtype=np.float32)
+
+
+	def frames(self, samples: np.ndarray) -> np.ndarray:
+		count = 1 + (len(samples) - self.WINDOW) // self.HOP if len(samples) >= self.WINDOW else 0
+		step = samples.strides[0]
+		return np.lib.stride_tricks.as_strided(samples, shape=(count, self.WINDOW), strides=(step * self.HOP, step), writeable=False)
+
+
+	def features(self, frames: np.ndarray) -> np.ndarray:
+		emphasized = np.empty_like(frames)
+		emphasized[:, 0] = frames[:, 0]
+		emphasized[:, 1:] = frames[:, 1:] - self.PRE_EMPHASIS * frames[:, :-1]
+
+		power = np.abs(np.fft.rfft(emphasized * self._window, self.FFT)) ** 2 / self.FFT
+		cepstra = np.log(power @ self._filters.T + 1e-10) @ self._dct.T
+		return cepstra / (np.linalg.norm(cepstra, axis=1, keepdims=True) + 1e-10)
+
+
+	def melFilterbank(self, sampleRate: int) -> np.ndarray:
+		highest = 2595 * np.log10(1 + sampleRate / 2 / 700)
+		hertz = 700 * (10 ** (np.linspace(0, highest, self.BANDS + 2) / 2595) - 1)
+		bins = np.floor((self.FFT + 1) * hertz / sampleRate).astype(int)
+
+		filters = np.zeros((self.BANDS, self.FFT // 2 + 1), dtype=np.float32)
+		for band in range(self.BANDS):
+			left, center, right = bins[band:band + 3]
+			filters[band, left:center] = (np.arange(left, center) - left) / max(center - left, 1)
+			filters[band, center:right] = (right - np.arange(center, right)) / max(right - center, 1)
+		return filters
+
+
+	def dctMatrix(self) -> np.ndarray:
+		k = np.arange(self.BANDS)[:, None]
+		n = np.arange(self.BANDS)[None, :]
+		dct = np.cos(np.pi * k * (2 * n + 1) / (2 * self.BANDS)) * np.sqrt(2 / self.BANDS)
+		dct[0] /= np.sqrt(2)
+		return dct.astype(np.float32)
+
+
+class DtwDetector(WakewordDetector):
+	"""
+	Personal wakewords, enrolled from a few recordings each. The incoming MFCC stream is matched against every
+	template at once with a streaming subsequence DTW: a match may start at any frame, each input frame moves along
+	a template by 0, 1 or 2 frames, and the path cost is averaged over the input frames. A path closing on the last
+	frame of a template under the threshold is a detection
+	"""
+
+	frameLength = 480
+	sampleRate = 16000
+
+	# Template frames quieter than the loudest one by more than this, in dB, are trimmed from both ends
+	TRIM_DB = 40
+	MIN_TEMPLATE_FRAMES = 10
+	# Average cosine distance accepted at sensitivity 0 and 1
+	STRICTEST = 0.1
+	LOOSEST = 0.5
+
+	def __init__(self, path: str = None, sensitivity: float = 0.5):
+		self._path = Path(path) if path else Path(__file__).resolve().parents[3] / 'trained/hotwords/dtw'
+		self._threshold = self.STRICTEST + (self.LOOSEST - self.STRICTEST) * sensitivity
+		self._mfcc = Mfcc(self.sampleRate)
+
+		self._keywords = self.keywords(self._path)
+		templates = list()
+		owners = list()
+		for index, name in enumerate(self._keywords):
+			for recording in sorted((self._path / name).glob('*.wav')):
+				template = self.template(recording)
+				if len(template) >= self.MIN_TEMPLATE_FRAMES:
+					templates.append(template)
+					owners.append(index)
+
+		if not templates:
+			raise ValueError(f'No usable wakeword recording in {self._path}')
+
+		# All templates one after the other, so that each input frame is a handful of vector operations
+		self._templates = np.concatenate(templates)
+		lengths = np.array([len(template) for template in templates])
+		self._ends = np.cumsum(lengths) - 1
+		self._starts = self._ends - lengths + 1
+		self._owners = np.array(owners)
+		self._maxLengths = np.repeat(lengths * 2, lengths)
+
+		size = len(self._templates)
+		self._cost = np.full(size, np.inf)
+		self._length = np.zeros(size)
+		self._shifted = np.full((3, size), np.inf)
+		self._shiftedLength = np.zeros((3, size))
+		self._columns = np.arange(size)
+
+
+	@staticmethod
+	def keywords(path: Path) -> List[str]:
+		return sorted(folder.name for folder in path.iterdir() if folder.is_dir() and any(folder.glob('*.wav'))) if path.is_dir() else list()
+
+
+	def template(self, recording: Path) -> np.ndarray:
+		frames = self._mfcc.frames(self.readWav(recording))
+		if not len(frames):
+			return np.zeros((0, Mfcc.COEFFICIENTS))
+
+		energy = 10 * np.log10(np.sum(frames ** 2, axis=1) + 1e-10)
+		loud = np.flatnonzero(energy > energy.max() - self.TRIM_DB)
+		return self._mfcc.features(frames[loud[0]:loud[-1] + 1])
+
+
+	def readWav(self, recording: Path) -> np.ndarray:
+		"""
+		Reads a recording as mono samples at sampleRate, on the 16 bits scale, whatever its width, channels and rate
+		"""
+		with wave.open(str(recording), 'rb') as wav:
+			data = wav.readframes(wav.getnframes())
+			width = wav.getsampwidth()
+			channels = wav.getnchannels()
+			rate = wav.getframerate()
+
+		raw = np.frombuffer(data, dtype=np.uint8)
+		if width == 1:
+			# 8 bits wav samples are unsigned
+			samples = (raw.astype(np.float32) - 128) * 256
+		else:
+			# Little endian, the two most significant bytes are the last two
+			samples = raw[:len(raw) // width * width].reshape(-1, width)[:, width - 2:].copy().view('<i2').ravel().astype(np.float32)
+
+		samples = samples[:len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+		if rate != self.sampleRate:
+			positions = np.arange(len(samples) * self.sampleRate // rate) * rate / self.sampleRate
+			samples = np.interp(positions, np.arange(len(samples)), samples)
+		return samples.astype(np.float32)
+
+
+	def process(self, window: Union[bytes, bytearray, memoryview]) -> int:
+		detected = -1
+		for feature in self._mfcc.stream(np.frombuffer(window, dtype=np.int16).astype(np.float32)):
+			index = self.step(feature)
+			if index > -1:
+				detected = index
+		return detected
+
+
+	def step(self, feature: np.ndarray) -> int:
+		"""
+		Advances all the templates by one input frame
+		:return: the detected keyword index, -1 if none
+		"""
+		distance = 1 - self._templates @ feature
+
+		# Predecessors: same template frame, previous one, the one before. Never across templates
+		self._shifted[0] = self._cost
+		self._shifted[1, 1:] = self._cost[:-1]
+		self._shifted[2, 2:] = self._cost[:-2]
+		self._shifted[1, self._starts] = np.inf
+		self._shifted[2, self._starts] = np.inf
+		self._shifted[2, self._starts + 1] = np.inf
+
+		self._shiftedLength[0] = self._length
+		self._shiftedLength[1, 1:] = self._length[:-1]
+		self._shiftedLength[2, 2:] = self._length[:-2]
+
+		choice = np.argmin(self._shifted, axis=0)
+		self._cost = self._shifted[choice, self._columns] + distance
+		self._length = self._shiftedLength[choice, self._columns] + 1
+
+		# A match can start on any input frame
+		self._cost[self._starts] = distance[self._starts]
+		self._length[self._starts] = 1
+		# Stretched beyond twice the template, not the same word anymore
+		self._cost[self._length > self._maxLengths] = np.inf
+
+		scores = self._cost[self._ends] / self._length[self._ends]
+		best = int(np.argmin(scores))
+		if scores[best] > self._threshold:
+			return -1
+
+		self.reset()
+		return int(self._owners[best])
+
+
+	def reset(self):
+		self._cost.fill(np.inf)
+		self._length.fill(0)
+
+
+	def keyword(self, index: int) -> str:
+		return self._keywords[index]
+
+
+class DtwWakeword(DetectorWakewordEngine):
+
+	NAME = 'DTW personal wakeword'
+	DEPENDENCIES = {
+		'system': [],
+		'pip'   : {
+			'numpy'
+		}
+	}
+
+	def detectorFactory(self) -> Callable[[], DtwDetector]:
+		return functools.partial(DtwDetector, path=str(self.hotwordsPath), sensitivity=self.ConfigManager.getAliceConfigByName('wakewordSensitivity'))
+
+
+	def onDetected(self, index: int, keyword: str):
+		self.logDebug(f'Detected wakeword **{keyword}**')
+		self.MqttManager.localPublish(
+			topic=constants.TOPIC_HOTWORD_DETECTED.format('default'),
+			payload={
+				'siteId'            : self.ConfigManager.getAliceConfigByName('uuid'),
+				'modelId'           : keyword,
+				'modelVersion'      : '1',
+				'modelType'         : 'personal',
+				'currentSensitivity': self.ConfigManager.getAliceConfigByName('wakewordSensitivity')
+			}
+		)
+
+
+	@property
+	def hotwordsPath(self) -> Path:
+		return Path(self.Commons.rootDir(), 'trained/hotwords/dtw')
@@ -0,0 +1,135 @@
+from threading import Condition
+from typing import Union
+
+
+class PcmRingBuffer:
+	"""
+	A fixed size ring of int16 samples, written by the audio capture and read by a wakeword engine in windows of
+	exactly frameLength samples. Samples left over after a window stay for the next one, whatever the size of the
+	captured chunks. When the reader falls behind, the oldest samples are overwritten and counted
+	"""
+
+	def __init__(self, frameLength: int, capacity: int):
+		"""
+		:param frameLength: samples per window handed to the reader
+		:param capacity: samples the ring holds, at least one window
+		"""
+		self._frameLength = frameLength
+		self._capacity = max(capacity, frameLength)
+		self._storage = memoryview(bytearray(self._capacity * 2))
+		self._condition = Condition()
+
+		# Positions are total samples written and read, never wrapped, their difference is what's available
+		self._written = 0
+		self._read = 0
+
+		self._overflows = 0
+		self._droppedSamples = 0
+
+
+	def write(self, pcm: Union[bytes, bytearray, memoryview]):
+		data = memoryview(pcm).cast('B')
+		samples = len(data) // 2
+		if not samples:
+			return
+
+		with self._condition:
+			skipped = 0
+			if samples > self._capacity:
+				# Larger than the whole ring, only its end can be kept
+				skipped = samples - self._capacity
+				data = data[skipped * 2:]
+				samples = self._capacity
+
+			overwritten = max(samples - (self._capacity - (self._written - self._read)), 0)
+			if skipped or overwritten:
+				self._overflows += 1
+				self._droppedSamples += skipped + overwritten
+				self._read += overwritten
+
+			self._copyIn(data[:samples * 2])
+			self._written += samples
+
+			if self._written - self._read >= self._frameLength:
+				self._condition.notify()
+
+
+	def readInto(self, target: memoryview, timeout: float = None) -> bool:
+		"""
+		Waits for a full window and copies it into target
+		:param target: a writable buffer of frameLength * 2 bytes
+		:param timeout: seconds to wait at most, None waits until a window is available
+		:return: False if no window came in time
+		"""
+		with self._condition:
+			if not self._condition.wait_for(lambda: self._written - self._read >= self._frameLength, timeout=timeout):
+				return False
+
+			start = self._read % self._capacity * 2
+			end = start + self._frameLength * 2
+			if end <= len(self._storage):
+				target[:] = self._storage[start:end]
+			else:
+				split = len(self._storage) - start
+				target[:split] = self._storage[start:]
+				target[split:] = self._storage[:end - len(self._storage)]
+
+			self._read += self._frameLength
+			return True
+
+
+	def recent(self, samples: int) -> bytes:
+		"""
+		A copy of the last samples written, read or not, up to the ring capacity
+		"""
+		with self._condition:
+			samples = min(samples, self._capacity, self._written)
+			start = (self._written - samples) % self._capacity * 2
+			end = start + samples * 2
+			if end <= len(self._storage):
+				return self._storage[start:end].tobytes()
+			return self._storage[start:].tobytes() + self._storage[:end - len(self._storage)].tobytes()
+
+
+	def reset(self):
+		"""
+		Forgets the buffered samples, nothing is freed or reallocated
+		"""
+		with self._condition:
+			self._read = self._written
+
+
+	def _copyIn(self, data: memoryview):
+		start = self._written % self._capacity * 2
+		end = start + len(data)
+		if end <= len(self._storage):
+			self._storage[start:end] = data
+		else:
+			split = len(self._storage) - start
+			self._storage[start:] = data[:split]
+			self._storage[:len(data) - split] = data[split:]
+
+
+	@property
+	def frameLength(self) -> int:
+		return self._frameLength
+
+
+	@property
+	def capacity(self) -> int:
+		return self._capacity
+
+
+	@property
+	def available(self) -> int:
+		return self._written - self._read
+
+
+	@property
+	def overflows(self) -> int:
+		return self._overflows
+
+
+	@property
+	def droppedSamples(self) -> int:
+		return self._droppedSamples
@@ -1,13 +1,11 @@
-import io
-import pyaudio
-import queue
-import struct
-import wave
-from paho.mqtt.client import MQTTMessage
-from typing import Optional
+import functools
+from ctypes import byref, c_int, c_short
+from typing import Callable, List, Union
 
 from core.commons import constants
-from core.voice.model.WakewordEngine import WakewordEngine
+from core.voice.model.DetectorWakewordEngine import DetectorWakewordEngine
+from core.util.model.Logger import Logger
+from core.voice.model.WakewordDetector import WakewordDetector
 
 try:
 	import pvporcupine
@@ -15,114 +13,102 @@ except ModuleNotFoundError:
 	pass # Will auto install
 
 
-class PorcupineWakeword(WakewordEngine):
+class PorcupineDetector(WakewordDetector):
+
+	KEYWORDS = ['porcupine', 'bumblebee', 'terminator', 'blueberry']
+
+	_fallbackLogged = False
+
+	def __init__(self, keywords: List[str] = None, sensitivity: float = 0.5):
+		self._keywords = keywords or self.KEYWORDS
+		self._handler = pvporcupine.create(keywords=self._keywords, sensitivities=[sensitivity] * len(self._keywords))
+		self.frameLength = self._handler.frame_length
+		self.sampleRate = self._handler.sample_rate
+
+		# One frame buffer, shared with the C array handed to porcupine, refilled by a plain memory copy
+		self._frameBytes = bytearray(self.frameLength * 2)
+		self._frameView = memoryview(self._frameBytes)
+		self._frameArray = (c_short * self.frameLength).from_buffer(self._frameBytes)
+		self._result = c_int()
+
+		# The native process function, called directly on the shared buffer when the binding exposes it
+		self._processFunc = getattr(self._handler, 'process_func', None)
+		self._handle = getattr(self._handler, '_handle', None)
+		if not self.native and not PorcupineDetector._fallbackLogged:
+			PorcupineDetector._fallbackLogged = True
+			Logger(prepend='[Porcupine]').logInfo('This pvporcupine binding has no process_func, falling back to process(), one python int per sample')
+
+
+	def process(self, window: Union[bytes, bytearray, memoryview]) -> int:
+		self._frameView[:] = window
+		return self.processFrame()
+
+
+	def processFrame(self) -> int:
+		"""
+		Runs porcupine on the frame buffer without building a python int per sample, unless the binding is not native
+		:return: the detected keyword index, -1 if none
+		"""
+		if not self.native:
+			return self._handler.process(self._frameView.cast('h'))
+
+		status = self._processFunc(self._handle, self._frameArray, byref(self._result))
+		if status is not self._handler.PicovoiceStatuses.SUCCESS:
+			raise RuntimeError(f'Porcupine failed processing audio: {status}')
+
+		return self._result.value
+
+
+	def keyword(self, index: int) -> str:
+		return self._keywords[index]
+
+
+	def close(self):
+		self._handler.delete()
+
+
+	@property
+	def frame(self) -> memoryview:
+		"""
+		The frame buffer, fill it then call processFrame to skip a copy
+		"""
+		return self._frameView
+
+
+	@property
+	def native(self) -> bool:
+		return self._processFunc is not None and self._handle is not None
+
+
+	@property
+	def version(self) -> str:
+		return self._handler.version
+
+
+class PorcupineWakeword(DetectorWakewordEngine):
 
 	NAME = 'Porcupine'
+	VERSION = '1.7.0'
 	DEPENDENCIES = {
 		'system': [],
 		'pip'   : {
-			'pvporcupine==1.7.0'
+			f'pvporcupine=={VERSION}'
 		}
 	}
 
-	def __init__(self):
-		super().__init__()
-		self._working = self.ThreadManager.newEvent('ListenForWakeword')
-		self._buffer = queue.Queue()
-		self._hotwordThread = None
-
-		try:
-			self._handler = pvporcupine.create(keywords=['porcupine', 'bumblebee', 'terminator', 'blueberry'])
-			with self.Commons.shutUpAlsaFFS():
-				self._audio = pyaudio.PyAudio()
-		except:
-			self._enabled = False
-
-
-	def onBooted(self):
-		super().onBooted()
-		if self._enabled:
-			self.onHotwordToggleOn()
-
-
-	def onStop(self):
-		super().onStop()
-		if self._enabled:
-			self._working.clear()
-			self._buffer = queue.Queue()
-
-
-	def onHotwordToggleOff(self):
-		if self._enabled:
-			self._working.clear()
-			self._buffer = queue.Queue()
-			self._hotwordThread.join(timeout=2)
-
-
-	def onHotwordToggleOn(self):
-		if self._enabled:
-			self._working.set()
-			self._buffer = queue.Queue()
-			self._hotwordThread = self.ThreadManager.newThread(name='HotwordThread', target=self.worker)
-
-
-	def onAudioFrame(self, message: MQTTMessage, siteId: str):
-		if not self.enabled or not self._working.is_set():
-			return
-
-		with io.BytesIO(message.payload) as buffer:
-			try:
-				with wave.open(buffer, 'rb') as wav:
-					frame = wav.readframes(self.AudioServer.FRAMES_PER_BUFFER)
-					while frame:
-						self._buffer.put(frame)
-						frame = wav.readframes(self.AudioServer.FRAMES_PER_BUFFER)
-
-			except Exception as e:
-				self.logError(f'Error recording audio frame: {e}')
-
-
-	def worker(self):
-		while self._working.is_set():
-			stream = self.audioStream()
-			for data in stream:
-				if not self._working.is_set():
-					break
-
-				pcm = struct.unpack_from('h' * self._handler.frame_length, data)
-				result = self._handler.process(pcm)
-				if result is not None and result > -1:
-					self.logDebug('Detected wakeword')
-					self.MqttManager.localPublish(
-						topic=constants.TOPIC_HOTWORD_DETECTED.format('default'),
-						payload={
-							'siteId'            : self.ConfigManager.getAliceConfigByName('uuid'),
-							'modelId'           : f'porcupine_{result}',
-							'modelVersion'      : self._handler.version,
-							'modelType'         : 'universal',
-							'currentSensitivity': self.ConfigManager.getAliceConfigByName('wakewordSensitivity')
-						}
-					)
-					return
-
-
-	def audioStream(self) -> Optional[bytes]:
-		while self._working.is_set():
-			chunk = self._buffer.get()
-			if not chunk:
-				return
-
-			data = [chunk]
-			size = len(chunk)
-
-			while self._working and size < 1024:
-				try:
-					chunk = self._buffer.get(block=True)
-					if not chunk or not self._working:
-						return
-					size += len(chunk)
-					data.append(chunk)
-				except queue.Empty:
-					break
-
-			yield b''.join(data)
+	def detectorFactory(self) -> Callable[[], PorcupineDetector]:
+		return functools.partial(PorcupineDetector, sensitivity=self.ConfigManager.getAliceConfigByName('wakewordSensitivity'))
+
+
+	def onDetected(self, index: int, keyword: str):
+		self.logDebug('Detected wakeword')
+		self.MqttManager.localPublish(
+			topic=constants.TOPIC_HOTWORD_DETECTED.format('default'),
+			payload={
+				'siteId'            : self.ConfigManager.getAliceConfigByName('uuid'),
+				'modelId'           : f'porcupine_{index}',
+				'modelVersion'      : self._detector.version if self._detector else self.VERSION,
+				'modelType'         : 'universal',
+				'currentSensitivity': self.ConfigManager.getAliceConfigByName('wakewordSensitivity')
+			}
+		)
@@ -0,0 +1,173 @@
+from ctypes import c_short, c_uint32
+
+
+class SharedPcmRing:
+	"""
+	A ring of int16 samples in shared memory, written by the audio capture in the main process and read by a single
+	wakeword detector in a child process. It is lock free: the writer only moves the written position, the reader
+	keeps its own read position and counts what the writer overwrote before it could be read. The writer wakes the
+	reader with a semaphore rather than an event, a reader killed while waiting can't leave it locked.
+	Positions are 32 bits counters that wrap, so the capacity is a power of two
+	"""
+
+	MASK = 0xFFFFFFFF
+
+	def __init__(self, capacity: int, context):
+		"""
+		:param capacity: samples, rounded up to the next power of two
+		:param context: the multiprocessing context the reader process is started with
+		"""
+		self._capacity = 1 << max(capacity - 1, 1).bit_length()
+		self._samples = context.RawArray(c_short, self._capacity)
+		self._written = context.RawValue(c_uint32, 0)
+		self._floor = context.RawValue(c_uint32, 0)
+		self._dropped = context.RawValue(c_uint32, 0)
+		# The reader position, as seen from the writer side
+		self._consumed = context.RawValue(c_uint32, 0)
+		self._wakeup = context.Semaphore(0)
+
+		# Writer side only, samples held by the ring, at most its capacity
+		self._filled = 0
+
+		# Reader side only
+		self._read = 0
+		self._seenFloor = 0
+
+		self._view = memoryview(self._samples).cast('B')
+
+
+	def __getstate__(self) -> dict:
+		state = self.__dict__.copy()
+		del state['_view']
+		return state
+
+
+	def __setstate__(self, state: dict):
+		self.__dict__.update(state)
+		self._view = memoryview(self._samples).cast('B')
+		self.startReading()
+
+
+	def write(self, pcm):
+		data = memoryview(pcm).cast('B')
+		samples = len(data) // 2
+		if not samples:
+			return
+
+		if samples > self._capacity:
+			data = data[(samples - self._capacity) * 2:]
+			samples = self._capacity
+
+		written = self._written.value
+		start = written % self._capacity * 2
+		end = start + samples * 2
+		if end <= len(self._view):
+			self._view[start:end] = data[:samples * 2]
+		else:
+			split = len(self._view) - start
+			self._view[start:] = data[:split]
+			self._view[:end - len(self._view)] = data[split:samples * 2]
+
+		# Publish the samples only once they are copied
+		self._written.value = (written + samples) & self.MASK
+		self._filled = min(self._filled + samples, self._capacity)
+		self._wakeup.release()
+
+
+	def recent(self, samples: int) -> bytes:
+		"""
+		Writer side. A copy of the last samples written, read or not, up to the ring capacity
+		"""
+		samples = min(samples, self._filled)
+		start = (self._written.value - samples) % self._capacity * 2
+		end = start + samples * 2
+		if end <= len(self._view):
+			return self._view[start:end].tobytes()
+		return self._view[start:].tobytes() + self._view[:end - len(self._view)].tobytes()
+
+
+	def reset(self):
+		"""
+		Writer side. Makes the reader skip everything written so far
+		"""
+		self._floor.value = self._written.value
+
+
+	def startReading(self):
+		"""
+		Reader side. A new reader, possibly a restarted one, starts from what is written next
+		"""
+		self._seenFloor = self._floor.value
+		self._read = self._written.value
+		self._consumed.value = self._read
+
+		# Wakeups posted while nobody was reading
+		while self._wakeup.acquire(block=False):
+			pass
+
+
+	def readInto(self, target: memoryview, timeout: float = None) -> bool:
+		"""
+		Reader side. Waits for a full window, the size of target, and copies it
+		:param target: a writable buffer of a whole number of samples
+		:param timeout: seconds to wait at most
+		:return: False if no window came in time
+		"""
+		frameLength = len(target) // 2
+		while True:
+			available = self._available()
+			if available >= frameLength:
+				start = self._read % self._capacity * 2
+				end = start + frameLength * 2
+				if end <= len(self._view):
+					target[:] = self._view[start:end]
+				else:
+					split = len(self._view) - start
+					target[:split] = self._view[start:]
+					target[split:] = self._view[:end - len(self._view)]
+
+				# Overwritten while copying, the window is torn, get a fresh one
+				if (self._written.value - self._read) & self.MASK <= self._capacity:
+					self._read = (self._read + frameLength) & self.MASK
+					self._consumed.value = self._read
+					return True
+				continue
+
+			if not self._wakeup.acquire(timeout=timeout):
+				return False
+
+
+	def _available(self) -> int:
+		floor = self._floor.value
+		if floor != self._seenFloor:
+			self._seenFloor = floor
+			self._read = floor
+
+		written = self._written.value
+		available = (written - self._read) & self.MASK
+		if available > self._capacity:
+			# Lapped by the writer, skip to the oldest sample still there
+			self._dropped.value = (self._dropped.value + available - self._capacity) & self.MASK
+			self._read = (written - self._capacity) & self.MASK
+			return self._capacity
+
+		return available
+
+
+	@property
+	def capacity(self) -> int:
+		return self._capacity
+
+
+	@property
+	def unread(self) -> int:
+		"""
+		Samples written but not read yet, those lost to the writer excluded
+		"""
+		written = self._written.value
+		return min((written - self._consumed.value) & self.MASK, (written - self._floor.value) & self.MASK, self._capacity)
+
+
+	@property
+	def droppedSamples(self) -> int:
+		return self._dropped.value
@@ -18,12 +18,15 @@
 #  Last modified: 2021.05.19 at 12:56:48 CEST
 
 import os
+import time
 
 from core.voice.model.WakewordEngine import WakewordEngine
 
 
 class SnipsWakeword(WakewordEngine):
 	NAME = 'Snips hotword'
+	# snips-hotword doesn't tell when its models are loaded, both run for that long during a hot swap
+	SWAP_OVERLAP = 3
 	DEPENDENCIES = {
 		'system': [
 			'snips-hotword',
@@ -32,6 +35,10 @@ class SnipsWakeword(WakewordEngine):
 		'pip'   : []
 	}
 
+	def __init__(self):
+		super().__init__()
+		self._processName = 'SnipsHotword'
+
 
 	def installDependencies(self) -> bool:
 		installed = self.Commons.runRootSystemCommand(['apt-get', 'install', '-y', f'{self.Commons.rootDir()}/system/snips/snips-hotword_0.64.0_armhf.deb'])
@@ -44,12 +51,41 @@ class SnipsWakeword(WakewordEngine):
 
 	def onStop(self):
 		super().onStop()
-		self.SubprocessManager.terminateSubprocess(name='SnipsHotword')
+		self.SubprocessManager.terminateSubprocess(name=self._processName)
+		self.MqttManager.unregisterLocalBrokerConsumer(self.MqttManager.audioFrameTopic)
 
 
 	def onStart(self):
 		super().onStart()
+		# snips-hotword runs out of process and reads the audio frames from the local broker
+		self.MqttManager.registerLocalBrokerConsumer(self.MqttManager.audioFrameTopic)
+		self.SubprocessManager.runSubprocess(name=self._processName, cmd=self.command(), autoRestart=True)
+
+
+	def hotSwap(self) -> bool:
+		"""
+		Starts a second snips-hotword with the current models and stops the running one once the new one had the
+		time to load them. Both read the same audio frames from the broker, none is missed
+		"""
+		start = time.perf_counter()
+		previous = self._processName
+		name = 'SnipsHotwordSwap' if previous == 'SnipsHotword' else 'SnipsHotword'
+		if not self.SubprocessManager.runSubprocess(name=name, cmd=self.command(), autoRestart=True):
+			return False
+
+		time.sleep(self.SWAP_OVERLAP)
+		if not self.SubprocessManager.isSubprocessAlive(name):
+			self.logError('The new snips-hotword process died, keeping the running one')
+			self.SubprocessManager.terminateSubprocess(name=name)
+			return True
+
+		self._processName = name
+		self.SubprocessManager.terminateSubprocess(name=previous)
+		self.logInfo(f'Snips hotword models swapped in {(time.perf_counter() - start) * 1000:.0f} ms, 0 frames missed')
+		return True
+
 
+	def command(self) -> str:
 		cmd = f'snips-hotword --assistant {self.Commons.rootDir()}/assistant --audio {self.ConfigManager.getAliceConfigByName("uuid")}@mqtt'
 
 		if self.ConfigManager.getAliceConfigByName('mqttUser'):
@@ -62,4 +98,4 @@ class SnipsWakeword(WakewordEngine):
 			if os.path.isdir(os.path.join(f'{self.Commons.rootDir()}/trained/hotwords/snips_hotword/', model)):
 				cmd += f' --model {self.Commons.rootDir()}/trained/hotwords/snips_hotword/{model}={self.ConfigManager.getAliceConfigByName("wakewordSensitivity")}'
 
-		self.SubprocessManager.runSubprocess(name='SnipsHotword', cmd=cmd, autoRestart=True)
+		return cmd
@@ -0,0 +1,78 @@
+import traceback
+from abc import ABC, abstractmethod
+from typing import Callable, Union
+
+from core.voice.model.SharedPcmRing import SharedPcmRing
+
+
+class WakewordDetector(ABC):
+	"""
+	The audio crunching part of a wakeword engine, without any ProjectAlice object so that it can be built in a child
+	process or by a benchmark. It is fed windows of exactly frameLength int16 samples at sampleRate
+	"""
+
+	frameLength = 512
+	sampleRate = 16000
+
+	_frame: memoryview = None
+
+
+	@property
+	def frame(self) -> memoryview:
+		"""
+		A buffer of frameLength samples. Filling it then calling processFrame spares a copy
+		"""
+		if self._frame is None:
+			self._frame = memoryview(bytearray(self.frameLength * 2))
+		return self._frame
+
+
+	def processFrame(self) -> int:
+		return self.process(self.frame)
+
+
+	@abstractmethod
+	def process(self, window: Union[bytes, bytearray, memoryview]) -> int:
+		"""
+		:param window: frameLength samples
+		:return: the index of the detected keyword, -1 if none
+		"""
+		pass
+
+
+	def keyword(self, index: int) -> str:
+		return str(index)
+
+
+	def close(self):
+		pass # Super object function is overridden only if needed
+
+
+def runDetector(factory: Callable[[], WakewordDetector], ring: SharedPcmRing, connection, stop):
+	"""
+	Child process entry point. Builds the detector, then runs it on the shared ring until the shared stop flag is
+	raised, sending ('ready', frameLength), ('detected', index, keyword) and ('error', message) tuples back over the pipe
+	"""
+	detector = None
+	try:
+		ring.startReading()
+		detector = factory()
+		window = memoryview(bytearray(detector.frameLength * 2))
+		connection.send(('ready', detector.frameLength))
+
+		while not stop.value:
+			if not ring.readInto(window, timeout=0.5):
+				continue
+
+			result = detector.process(window)
+			if result > -1:
+				connection.send(('detected', result, detector.keyword(result)))
+	except KeyboardInterrupt:
+		pass
+	except Exception as e:
+		connection.send(('error', f'{e}\n{traceback.format_exc()}'))
+		raise
+	finally:
+		if detector:
+			detector.close()
+		connection.close()
@@ -17,8 +17,11 @@
 #
 #  Last modified: 2021.04.13 at 12:56:48 CEST
 
+from typing import Callable, Optional
+
 from core.base.model.ProjectAliceObject import ProjectAliceObject
 from core.commons import constants
+from core.voice.model.WakewordDetector import WakewordDetector
 
 
 class WakewordEngine(ProjectAliceObject):
@@ -40,6 +43,41 @@ class WakewordEngine(ProjectAliceObject):
 		self._enabled = False
 
 
+	def onPcmFrame(self, pcm: bytes):
+		"""
+		Captured audio, raw 16 bits mono PCM at AudioManager.SAMPLERATE, delivered in process by the audio server.
+		Engines listening to the local broker instead don't need it
+		:param pcm:
+		"""
+		pass # Super object function is overridden only if needed
+
+
+	def detectorFactory(self) -> Optional[Callable[[], WakewordDetector]]:
+		"""
+		Engines running their inference in python return a picklable callable building their detector, so that it
+		can be hosted in a child process. Engines that can't, return None
+		"""
+		return None
+
+
+	def onDetected(self, index: int, keyword: str):
+		"""
+		Called when the detector built by detectorFactory fires. The keyword is named by that detector, the engine
+		may have built another one with other models since
+		:param index:
+		:param keyword:
+		"""
+		pass # Super object function is overridden only if needed
+
+
+	def hotSwap(self) -> bool:
+		"""
+		Loads the current models next to the running ones and swaps them without pausing detection
+		:return: False if the engine can't, it then has to be restarted
+		"""
+		return False
+
+
 	@property
 	def enabled(self) -> bool:
 		return self._enabled
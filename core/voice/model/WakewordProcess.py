@@ -0,0 +1,198 @@
+import multiprocessing
+import threading
+import time
+from ctypes import c_bool
+from typing import Callable, Optional
+
+from core.base.model.ProjectAliceObject import ProjectAliceObject
+from core.voice.model.SharedPcmRing import SharedPcmRing
+from core.voice.model.WakewordDetector import WakewordDetector, runDetector
+
+
+class WakewordProcess(ProjectAliceObject):
+	"""
+	Hosts a wakeword detector in a child process, so that inference gets its own core and GIL. Captured audio goes
+	through a shared memory ring, detections come back over a pipe. A supervisor thread relays the detections and
+	restarts the child if it dies
+	"""
+
+	RING_SECONDS = 2
+	RESTART_DELAY = 2
+	# Audio replayed to a swapped in process before it takes over, so that it doesn't start cold
+	WARMUP_SECONDS = 1
+
+
+	def __init__(self, name: str, factory: Callable[[], WakewordDetector], onDetected: Callable[[int, str], None], sampleRate: int = 16000):
+		super().__init__()
+		self._name = name
+		self._factory = factory
+		self._onDetected = onDetected
+		self._sampleRate = sampleRate
+		# Forked. Spawning would re-run main.py in the child, log file truncation included. The child only runs the
+		# detector loop, it never touches the locks the parent threads may have held when forking
+		self._context = multiprocessing.get_context('fork')
+		self._ring = SharedPcmRing(capacity=sampleRate * self.RING_SECONDS, context=self._context)
+		self._stop = self._context.RawValue(c_bool, False)
+		self._process: Optional[multiprocessing.Process] = None
+		self._connection = None
+		self._running = False
+		self._listening = False
+		self._warming = False
+		self._warmedUp = False
+		self._restarts = 0
+		self._frameLength = 0
+		self._ready = threading.Event()
+
+
+	def start(self):
+		self._running = True
+		self._spawn()
+		self.ThreadManager.newThread(name=f'{self._name}Supervisor', target=self.supervise)
+
+
+	def stop(self):
+		self._running = False
+		self._listening = False
+		self._warming = False
+		self._stop.value = True
+
+		if self._process:
+			self._process.join(timeout=2)
+			if self._process.is_alive():
+				self._process.terminate()
+				self._process.join(timeout=1)
+
+		self.ThreadManager.terminateThread(name=f'{self._name}Supervisor')
+
+
+	def listen(self):
+		self._ring.reset()
+		self._listening = True
+
+
+	def pause(self):
+		self._listening = False
+		self._ring.reset()
+
+
+	def warmUp(self, previous: 'WakewordProcess'):
+		"""
+		Capture thread. Replays the last second the previous process was handed, then takes the audio that follows,
+		without reporting detections until takeOver
+		"""
+		self._ring.reset()
+		self._ring.write(previous.recent(self._sampleRate * self.WARMUP_SECONDS))
+		self._warming = True
+		self._warmedUp = True
+
+
+	def takeOver(self, listening: bool):
+		"""
+		Ends the warm up. The ring isn't reset, the detector goes on with the audio it was warmed up with
+		"""
+		self._listening = listening
+		self._warming = False
+		if not listening:
+			self._ring.reset()
+
+
+	def recent(self, samples: int) -> bytes:
+		return self._ring.recent(samples)
+
+
+	def waitReady(self, timeout: float) -> bool:
+		return self._ready.wait(timeout)
+
+
+	def drain(self, timeout: float) -> int:
+		"""
+		Gives the child some time to process what it was handed
+		:return: the number of frames still unread
+		"""
+		deadline = time.monotonic() + timeout
+		while self.alive and self._ring.unread >= self._frameLength and time.monotonic() < deadline:
+			time.sleep(0.01)
+		return self._ring.unread // max(self._frameLength, 1)
+
+
+	def write(self, pcm):
+		if self._listening or self._warming:
+			self._ring.write(pcm)
+
+
+	def supervise(self):
+		while self._running:
+			try:
+				if self._connection.poll(0.5):
+					self._onMessage(self._connection.recv())
+					continue
+			except (EOFError, OSError):
+				time.sleep(0.5) # The child is gone, only its exit code is left to check
+
+			if self._running and not self._process.is_alive():
+				self._restarts += 1
+				self.logWarning(f'Wakeword process died with exit code {self._process.exitcode}, restarting ({self._restarts} restarts so far)')
+				time.sleep(self.RESTART_DELAY)
+				if self._running:
+					self._spawn()
+
+
+	def _spawn(self):
+		self._ready.clear()
+		self._stop.value = False
+		receiver, sender = self._context.Pipe(duplex=False)
+		self._process = self._context.Process(name=self._name, target=runDetector, args=(self._factory, self._ring, sender, self._stop), daemon=True)
+		self._process.start()
+		sender.close()
+		self._connection = receiver
+
+
+	def _onMessage(self, message: tuple):
+		kind = message[0]
+		if kind == 'detected':
+			# Warming up, or paused already, by a toggle off or an earlier detection
+			if not self._listening:
+				return
+
+			# Same as in process engines, stop listening until the hotword is toggled on again
+			self.pause()
+			self._onDetected(message[1], message[2])
+		elif kind == 'ready':
+			self._frameLength = message[1]
+			self._ready.set()
+			self.logInfo(f'Wakeword process started, pid {self._process.pid}')
+		elif kind == 'error':
+			self.logError(f'Wakeword process failed: {message[1]}')
+
+
+	@property
+	def alive(self) -> bool:
+		return self._process is not None and self._process.is_alive()
+
+
+	@property
+	def listening(self) -> bool:
+		return self._listening
+
+
+	@property
+	def warmedUp(self) -> bool:
+		"""
+		Set by warmUp and never cleared, so that a process is warmed up once only
+		"""
+		return self._warmedUp
+
+
+	@property
+	def frameLength(self) -> int:
+		return self._frameLength
+
+
+	@property
+	def restarts(self) -> int:
+		return self._restarts
+
+
+	@property
+	def droppedSamples(self) -> int:
+		return self._ring.droppedSamples